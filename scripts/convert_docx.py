@@ -15,9 +15,16 @@ import argparse
 from pathlib import Path
 import xml.etree.ElementTree as ET
 from urllib.parse import unquote
+import posixpath
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import contextlib
+import tempfile
 import time
+import html
+import mimetypes
 
 # Import the FrontMatterManager
 try:
@@ -33,7 +40,7 @@ except ImportError:
 
 try:
     import mammoth
-    from PIL import Image
+    from PIL import Image, ImageSequence
 except ImportError:
     print("❌ Required packages not found.")
     print("Please install dependencies:")
@@ -41,8 +48,127 @@ except ImportError:
     print("   or run: pip install -r requirements.txt")
     sys.exit(1)
 
+try:
+    from markdownify import MarkdownConverter
+except ImportError:
+    MarkdownConverter = None
+
+# Bump when the output format changes in a way the source hash can't see
+CONVERTER_VERSION = "1"
+
+# Images are stored once under their content hash, shared by every document using them
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif', '.webp'}
+
+# Chunk size for streaming images out of DOCX archives
+COPY_CHUNK_SIZE = 1 << 20
+
+# OOXML namespaces needed to resolve image relationships
+RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+IMAGE_RELATIONSHIP_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+BLIP_TAG = '{http://schemas.openxmlformats.org/drawingml/2006/main}blip'
+BLIP_FILL_TAG = '{http://schemas.openxmlformats.org/drawingml/2006/picture}blipFill'
+IMAGEDATA_TAG = '{urn:schemas-microsoft-com:vml}imagedata'
+# Subtrees mammoth never renders, so their images are not extracted up front
+SKIPPED_TAGS = {'{http://schemas.openxmlformats.org/markup-compatibility/2006}Choice',
+                '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}del',
+                '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}moveFrom'}
+
+# Defaults for the optional image optimization stage, enabled per directory
+# or per file with an `images:` entry in the _docx/_config.yml hierarchy, e.g.
+#   defaults:
+#     images:
+#       format: webp        # webp, png, or original (bmp/tiff still become png)
+#       max_width: 1600     # downscale anything wider
+#       quality: 80
+#       srcset: [480, 960]  # extra widths for responsive <img srcset>
+IMAGE_OPTIMIZE_DEFAULTS = {'format': 'webp', 'max_width': 1600, 'quality': 80, 'srcset': []}
+
+# Names of content-addressed images: <sha256>[-<settingskey>[-<width>w]], the only files gc_images may delete
+STORED_IMAGE_RE = re.compile(r'[0-9a-f]{64}(?:-[0-9a-f]{8}(?:-\d+w)?)?')
+
+# Formats browsers can't show, or that are wasteful, are always re-encoded when optimizing
+PASSTHROUGH_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+# Line patterns for normalize_markdown, compiled once
+HEADING_RE = re.compile(r'#{1,6}(?:\s|$)')
+LIST_ITEM_RE = re.compile(r'(?:\*|\d+\.)')
+IMAGE_RE = re.compile(r'!\[[^\]\n]*\]\([^)\n]*\)|<img\s')
+TABLE_SEPARATOR_RE = re.compile(r'\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+FENCE_RE = re.compile(r'(?:```|~~~)')
+
+def normalize_markdown(markdown_text):
+    """
+    Clean and format markdown in a single line-by-line pass
+    
+    Collapses runs of blank lines, puts a blank line before headings and
+    list items and after headings, and strips leading/trailing blank lines.
+    Fenced code blocks are left untouched. Every line is looked at once, so
+    the cost is linear in the document size.
+    
+    Returns:
+        tuple: (markdown_text, stats) where stats counts images, headings and tables
+    """
+    stats = {'images': 0, 'headings': 0, 'tables': 0}
+    output = []
+    blank_pending = False   # a blank line is owed before the next content line
+    after_heading = False
+    in_fence = False
+    previous_table_row = False
+    
+    for line in markdown_text.split('\n'):
+        if in_fence:
+            output.append(line)
+            if FENCE_RE.match(line.lstrip()):
+                in_fence = False
+            continue
+        
+        if not line.strip():
+            blank_pending = True
+            previous_table_row = False
+            continue
+        
+        # Cheap first-character checks keep the regexes off most lines
+        first = line[0]
+        stripped = line.lstrip() if first in ' \t' else line
+        heading = first == '#' and HEADING_RE.match(line) is not None
+        if heading or after_heading or ((first == '*' or first.isdigit()) and LIST_ITEM_RE.match(line)):
+            blank_pending = True
+        if output and blank_pending:
+            output.append('')
+        blank_pending = False
+        after_heading = heading
+        output.append(line)
+        
+        if heading:
+            stats['headings'] += 1
+        elif stripped[0] in '`~' and FENCE_RE.match(stripped):
+            in_fence = True
+        if stripped.startswith('|'):
+            if previous_table_row and '-' in stripped and TABLE_SEPARATOR_RE.match(stripped):
+                stats['tables'] += 1
+            previous_table_row = True
+        else:
+            previous_table_row = False
+        if '!' in line or '<img' in line:
+            stats['images'] += len(IMAGE_RE.findall(line))
+    
+    return '\n'.join(output).rstrip(), stats
+
+if MarkdownConverter:
+    class SrcsetMarkdownConverter(MarkdownConverter):
+        """markdownify converter that keeps responsive images as raw <img srcset> HTML"""
+
+        def convert_img(self, el, text, *args, **kwargs):
+            if not el.attrs.get('srcset'):
+                return super().convert_img(el, text, *args, **kwargs)
+            attrs = ' '.join(f'{name}="{html.escape(el.attrs[name])}"'
+                             for name in ('src', 'srcset', 'sizes', 'alt') if el.attrs.get(name))
+            return f'<img {attrs}>'
+
 class DocxConverter:
-    def __init__(self, docx_dir="_docx", posts_dir="_posts", images_dir="images/docx"):
+    def __init__(self, docx_dir="_docx", posts_dir="_posts", images_dir="images/docx",
+                 manifest_path=".cache/docx.manifest", jobs=None, use_threads=False,
+                 disambiguate_permalinks=False):
         """
         Initialize DocxConverter
         
@@ -50,11 +176,21 @@ class DocxConverter:
             docx_dir: Directory containing DOCX files (supports subdirectories)
             posts_dir: Jekyll posts directory  
             images_dir: Directory for extracted images
+            manifest_path: Build manifest mapping each DOCX to its outputs
+            jobs: Number of conversion workers (defaults to the CPU count)
+            use_threads: Use a thread pool instead of processes (mostly for benchmarking)
+            disambiguate_permalinks: Prefix colliding default permalinks with the subfolder
         """
         self.base_dir = Path.cwd()
         self.docx_dir = self.base_dir / docx_dir
         self.posts_dir = self.base_dir / posts_dir
         self.images_dir = self.base_dir / images_dir
+        self.manifest_path = self.base_dir / manifest_path
+        self.jobs = jobs or os.cpu_count() or 1
+        self.use_threads = use_threads
+        self.disambiguate_permalinks = disambiguate_permalinks
+        self.manifest = None  # Set by convert_all_docx for the run summary
+        self.removed_documents = 0  # Counted by remove_deleted_documents
         
         # Initialize FrontMatterManager
         if FrontMatterManager:
@@ -97,93 +233,350 @@ class DocxConverter:
         """Ensure the directory for a file path exists"""
         file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    def extract_images_from_docx(self, docx_path, doc_name, subfolder=""):
+    def extract_images_from_docx(self, docx_source, doc_name, subfolder="", settings=None, members=None):
         """
-        Extract images from DOCX file
+        Extract images from DOCX file into the content-addressed image store
+        
+        Each image is stored once as images/docx/<sha256><ext>, so a logo or
+        screenshot shared by many documents is written a single time, and an
+        image already in the store is never rewritten. Images are streamed
+        from the archive in chunks rather than read into memory.
+        
+        With optimization settings, the stored files are the transcoded image
+        and its srcset variants instead, named <sha256>-<settings key>; see
+        optimize_images.
         
         Args:
-            docx_path: Path to the DOCX file
+            docx_source: Path to the DOCX file, or an already open zipfile.ZipFile
             doc_name: Base name for the document
-            subfolder: Subfolder context for unique naming
+            subfolder: Subfolder context (kept for callers; store names are content based)
+            settings: Image optimization settings from image_settings, or None
+            members: Archive members to extract; defaults to the images the
+                     document body references (see read_image_references)
         """
-        images_found = []
+        if not isinstance(docx_source, zipfile.ZipFile):
+            try:
+                with zipfile.ZipFile(docx_source, 'r') as zip_ref:
+                    return self.extract_images_from_docx(zip_ref, doc_name, subfolder, settings, members)
+            except (OSError, zipfile.BadZipFile) as e:
+                print(f"  ⚠️ Warning: Could not extract images from {docx_source}: {e}")
+                return []
         
-        # Include subfolder in doc_name if present
-        if subfolder:
-            # Replace path separators with underscores for safe filenames
-            folder_prefix = subfolder.replace(os.sep, "_").replace("/", "_")
-            full_doc_name = f"{folder_prefix}_{doc_name}"
-        else:
-            full_doc_name = doc_name
+        zip_ref = docx_source
+        images_found = []
+        transcode_jobs = []
         
         try:
-            with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-                # List all files in the DOCX
-                for file_info in zip_ref.filelist:
-                    # Check for images in media directory (both word/media/ and media/)
-                    if (file_info.filename.startswith('word/media/') or 
-                        file_info.filename.startswith('media/')):
-                        
-                        # Skip directories
-                        if file_info.filename.endswith('/'):
-                            continue
-                            
-                        # Extract image
-                        image_data = zip_ref.read(file_info.filename)
-                        
-                        # Get file extension
-                        original_name = Path(file_info.filename).name
-                        ext = Path(original_name).suffix.lower()
-                        
-                        # Verify it's actually an image file
-                        image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif', '.webp'}
-                        if ext not in image_extensions:
-                            print(f"  Skipping non-image file: {original_name}")
-                            continue
-                        
-                        # Create new filename with document prefix (including folder context)
-                        image_name = f"{full_doc_name}_{original_name}"
-                        image_path = self.images_dir / image_name
-                        
-                        # Write image file
-                        with open(image_path, 'wb') as img_file:
-                            img_file.write(image_data)
-                        
-                        # Verify the image was written correctly
-                        if image_path.exists() and image_path.stat().st_size > 0:
-                            images_found.append({
-                                'original': original_name,
-                                'new_name': image_name,
-                                'path': image_path,
-                                'relative_path': f"/images/docx/{image_name}",
-                                'size': len(image_data)
-                            })
-                            
-                            print(f"  Extracted: {image_name} ({len(image_data):,} bytes)")
-                        else:
-                            print(f"  ❌ Failed to write: {image_name}")
-                        
+            if members is None:
+                references, targets = self.read_image_references(zip_ref)
+                members = self.referenced_members(references, targets)
+            
+            # Only media the document actually shows; unused media is never written
+            for member in members:
+                try:
+                    file_info = zip_ref.getinfo(member)
+                except KeyError:
+                    print(f"  ⚠️ Referenced image missing from archive: {member}")
+                    continue
+                
+                # Get file extension
+                original_name = Path(file_info.filename).name
+                ext = Path(original_name).suffix.lower()
+                
+                # Verify it's actually an image file
+                if ext not in IMAGE_EXTENSIONS:
+                    print(f"  Skipping non-image file: {original_name}")
+                    continue
+                
+                image_hash = self.archived_hash(zip_ref, file_info)
+                
+                if settings:
+                    image = self.optimized_image(image_hash, ext, settings)
+                    if image is None:
+                        # Not cached yet: stage the original for the transcoding pool
+                        source_path = self.images_dir / f".{image_hash}{ext}.{os.getpid()}.src"
+                        self.stream_from_archive(zip_ref, file_info, source_path)
+                        transcode_jobs.append((member, image_hash, ext, source_path, file_info.file_size))
+                    else:
+                        image.update({'original': original_name, 'target': member, 'hash': image_hash,
+                                      'size': file_info.file_size, 'written': False})
+                        images_found.append(image)
+                        print(f"  Reused: {original_name} -> {image['new_name']} (optimized, cached)")
+                    continue
+                
+                image_name = f"{image_hash}{ext}"
+                image_path = self.images_dir / image_name
+                
+                if image_path.exists():
+                    written = False
+                else:
+                    self.stream_from_archive(zip_ref, file_info, image_path)
+                    written = True
+                
+                # Verify the image was written correctly
+                if image_path.exists() and image_path.stat().st_size > 0:
+                    images_found.append({
+                        'original': original_name,
+                        'target': member,
+                        'hash': image_hash,
+                        'new_name': image_name,
+                        'path': image_path,
+                        'files': [image_path],
+                        'relative_path': f"/images/docx/{image_name}",
+                        'srcset': None,
+                        'size': file_info.file_size,
+                        'written': written
+                    })
+                    
+                    status = "Extracted" if written else "Reused"
+                    print(f"  {status}: {original_name} -> {image_name[:12]}{ext} ({file_info.file_size:,} bytes)")
+                else:
+                    print(f"  ❌ Failed to write: {image_name}")
+                    
         except Exception as e:
-            print(f"  ⚠️ Warning: Could not extract images from {docx_path}: {e}")
+            print(f"  ⚠️ Warning: Could not extract images from {zip_ref.filename}: {e}")
+        
+        if transcode_jobs:
+            images_found.extend(self.optimize_images(transcode_jobs, settings))
             
         return images_found
 
-    def clean_markdown(self, markdown_text):
-        """Clean and format markdown text"""
-        # Remove extra whitespace
-        markdown_text = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown_text)
+    def store_image_bytes(self, data, ext, settings=None):
+        """
+        Put an image mammoth emitted but extract_images_from_docx did not
+        (a footnote, endnote or header picture, say) into the image store
         
-        # Fix heading spacing
-        markdown_text = re.sub(r'\n(#{1,6})', r'\n\n\1', markdown_text)
-        markdown_text = re.sub(r'(#{1,6}.*?)\n([^\n#])', r'\1\n\n\2', markdown_text)
+        Returns:
+            dict: Image record like extract_images_from_docx's, or None if it isn't an image
+        """
+        if ext not in IMAGE_EXTENSIONS:
+            return None
+        image_hash = hashlib.sha256(data).hexdigest()
+        original_name = f"{image_hash[:12]}{ext}"
         
-        # Clean up list formatting
-        markdown_text = re.sub(r'\n(\*|\d+\.)', r'\n\n\1', markdown_text)
+        if settings:
+            image = self.optimized_image(image_hash, ext, settings)
+            if image is None:
+                source_path = self.images_dir / f".{image_hash}{ext}.{os.getpid()}.src"
+                source_path.write_bytes(data)
+                return self.optimize_images([(original_name, image_hash, ext, source_path, len(data))], settings)[0]
+            image.update({'original': original_name, 'target': None, 'hash': image_hash,
+                          'size': len(data), 'written': False})
+            return image
+        
+        image_name = f"{image_hash}{ext}"
+        image_path = self.images_dir / image_name
+        written = not image_path.exists()
+        if written:
+            temp_path = image_path.with_name(f".{image_name}.{os.getpid()}.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, image_path)
+        return {
+            'original': original_name,
+            'target': None,
+            'hash': image_hash,
+            'new_name': image_name,
+            'path': image_path,
+            'files': [image_path],
+            'relative_path': f"/images/docx/{image_name}",
+            'srcset': None,
+            'size': len(data),
+            'written': written
+        }
+
+    def image_settings(self, docx_path, doc_name):
+        """
+        Image optimization settings for a document, or None if disabled
+        
+        Read from the `images` key of the merged _config.yml metadata, so it can
+        be set under defaults, a folder name, or a single file.
+        """
+        if not self.fm_manager:
+            return None
+        config = self.fm_manager.get_file_metadata(docx_path, doc_name).get('images')
+        if not config:
+            return None
+        if config is True:
+            config = {}
+        if not config.get('optimize', True):
+            return None
+        settings = {key: config.get(key, default) for key, default in IMAGE_OPTIMIZE_DEFAULTS.items()}
+        settings['srcset'] = sorted({int(w) for w in settings['srcset'] or []})
+        if settings['format'] not in ('webp', 'png', 'original'):
+            print(f"  ⚠️ Unknown image format {settings['format']!r}, using webp")
+            settings['format'] = 'webp'
+        return settings
+
+    @staticmethod
+    def settings_key(settings):
+        """Short stable key for a settings dict, part of optimized image names"""
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:8]
+
+    @staticmethod
+    def optimized_extension(ext, settings):
+        if settings['format'] == 'webp':
+            return '.webp'
+        if settings['format'] == 'original' and ext in PASSTHROUGH_EXTENSIONS:
+            return '.jpg' if ext == '.jpeg' else ext
+        return '.png'
+
+    def optimized_image(self, image_hash, ext, settings):
+        """
+        Look up an already transcoded image by source hash and settings
+        
+        Returns:
+            dict: Image record (without per-document fields), or None if any output is missing
+        """
+        stem = f"{image_hash}-{self.settings_key(settings)}"
+        out_ext = self.optimized_extension(ext, settings)
+        image_path = self.images_dir / f"{stem}{out_ext}"
+        if not image_path.exists():
+            return None
+        try:
+            # Only the header is read to learn the width
+            with Image.open(image_path) as im:
+                width = im.width
+        except OSError:
+            return None
+        variants = [(w, self.images_dir / f"{stem}-{w}w{out_ext}") for w in settings['srcset'] if w < width]
+        if not all(path.exists() for _, path in variants):
+            return None
+        return self.optimized_record(image_path, width, variants)
+
+    def optimized_record(self, image_path, width, variants):
+        srcset = None
+        if variants:
+            srcset = ', '.join([f"/images/docx/{path.name} {w}w" for w, path in variants] +
+                               [f"/images/docx/{image_path.name} {width}w"])
+        return {
+            'new_name': image_path.name,
+            'path': image_path,
+            'files': [image_path] + [path for _, path in variants],
+            'relative_path': f"/images/docx/{image_path.name}",
+            'srcset': srcset,
+        }
+
+    def optimize_images(self, jobs, settings):
+        """
+        Transcode staged originals, in a process pool when there are several
+        
+        Args:
+            jobs: (member, image_hash, ext, source_path, size) tuples
+            settings: Image optimization settings
+        """
+        stem_key = self.settings_key(settings)
+        tasks = []
+        for member, image_hash, ext, source_path, size in jobs:
+            stem = self.images_dir / f"{image_hash}-{stem_key}"
+            tasks.append((str(source_path), str(stem), self.optimized_extension(ext, settings), settings))
+        
+        images = []
+        workers = min(self.jobs, len(tasks))
+        try:
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    outputs = list(executor.map(transcode_image, *zip(*tasks)))
+            else:
+                outputs = [transcode_image(*task) for task in tasks]
+        finally:
+            for job in jobs:
+                job[3].unlink(missing_ok=True)
         
-        # Remove excessive newlines at start and end
-        markdown_text = markdown_text.strip()
+        for (member, image_hash, _, _, size), (image_path, width, variants) in zip(jobs, outputs):
+            original_name = posixpath.basename(member)
+            image = self.optimized_record(Path(image_path), width,
+                                          [(w, Path(path)) for w, path in variants])
+            image.update({'original': original_name, 'target': member, 'hash': image_hash,
+                          'size': size, 'written': True})
+            optimized_size = sum(path.stat().st_size for path in image['files'])
+            print(f"  Optimized: {original_name} -> {image['new_name']} "
+                  f"({size:,} -> {optimized_size:,} bytes, {len(variants)} srcset variant(s))")
+            images.append(image)
+        return images
+
+    @staticmethod
+    def read_image_references(zip_ref):
+        """
+        Resolve the document's images through its relationship IDs
+        
+        Both parts are read with a streaming parser, once per document. The
+        body is walked for pictures in drawings and VML image data, skipping
+        mc:Choice, deleted and moved-from runs that mammoth never renders, so
+        only images the post can show are extracted up front. Images are then
+        matched to mammoth's convert_image calls by content hash, never by
+        position.
+        
+        Returns:
+            tuple: (references, targets) - relationship IDs in document order
+                   (None for images that are only linked), and a mapping of
+                   relationship ID to archive member for embedded images
+        """
+        targets = {}
+        try:
+            with zip_ref.open('word/_rels/document.xml.rels') as rels:
+                for _, element in ET.iterparse(rels):
+                    if (element.tag.endswith('}Relationship')
+                            and element.get('Type') == IMAGE_RELATIONSHIP_TYPE
+                            and element.get('TargetMode') != 'External'):
+                        target = unquote(element.get('Target', ''))
+                        if target.startswith('/'):
+                            member = target.lstrip('/')
+                        else:
+                            member = posixpath.normpath(posixpath.join('word', target))
+                        targets[element.get('Id')] = member
+                    element.clear()
+        except KeyError:
+            return [], {}
         
-        return markdown_text
+        references = []
+        stack = []
+        skip_depth = 0
+        with zip_ref.open('word/document.xml') as document:
+            for event, element in ET.iterparse(document, events=('start', 'end')):
+                if event == 'start':
+                    if skip_depth or element.tag in SKIPPED_TAGS:
+                        skip_depth += 1
+                    elif element.tag == BLIP_TAG and stack and stack[-1] == BLIP_FILL_TAG:
+                        embed = element.get(f'{RELATIONSHIP_NS}embed')
+                        if embed is not None or element.get(f'{RELATIONSHIP_NS}link') is not None:
+                            references.append(embed)
+                    elif element.tag == IMAGEDATA_TAG and element.get(f'{RELATIONSHIP_NS}id'):
+                        references.append(element.get(f'{RELATIONSHIP_NS}id'))
+                    stack.append(element.tag)
+                else:
+                    stack.pop()
+                    if skip_depth:
+                        skip_depth -= 1
+                    if not stack or stack[-1].endswith('}body'):
+                        # Drop finished paragraphs so memory stays flat on long documents
+                        element.clear()
+        return references, targets
+
+    @staticmethod
+    def referenced_members(references, targets):
+        """Unique archive members behind the references, in first-use order"""
+        return list(dict.fromkeys(targets[rid] for rid in references if rid in targets))
+
+    @staticmethod
+    def archived_hash(zip_ref, file_info):
+        """SHA-256 of an archive member, streamed without writing it anywhere"""
+        digest = hashlib.sha256()
+        with zip_ref.open(file_info) as src:
+            for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def stream_from_archive(zip_ref, file_info, path):
+        """Copy one archive member to path in chunks, replacing it atomically"""
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with zip_ref.open(file_info) as src, open(temp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        os.replace(temp_path, path)
+
+    def clean_markdown(self, markdown_text):
+        """Clean and format markdown text (see normalize_markdown for the stats too)"""
+        return normalize_markdown(markdown_text)[0]
 
     def extract_tables_from_docx(self, docx_path):
         """Simplified table handling - let mammoth handle table conversion"""
@@ -193,8 +586,15 @@ class DocxConverter:
 
 
 
-    def convert_docx_to_markdown(self, docx_path):
-        """Convert a single DOCX file to markdown"""
+    def convert_docx_to_markdown(self, docx_path, file_date=None, permalink=None):
+        """Convert a single DOCX file to markdown
+        
+        Args:
+            docx_path: Path to the DOCX file
+            file_date: Date for the post; defaults to the file's creation time
+            permalink: Permalink chosen by plan_permalinks; defaults to the configured one
+        """
+        permalink_override = permalink
         doc_name = docx_path.stem
         print(f"\nConverting: {docx_path.name}")
         
@@ -205,56 +605,54 @@ class DocxConverter:
         except ValueError:
             subfolder = ""
         
-        # Extract images first (with subfolder context)
-        images = self.extract_images_from_docx(docx_path, doc_name, subfolder)
-        
         # Tables will be handled directly by mammoth conversion
         
         try:
-            # Convert DOCX to markdown using mammoth
+            # Open the DOCX once: images stream out of the archive first, then
+            # mammoth reads the same file handle
+            settings = self.image_settings(docx_path, doc_name)
             with open(docx_path, "rb") as docx_file:
-                # Create a counter for sequential image mapping
-                image_counter = 0
+                with zipfile.ZipFile(docx_file) as docx_zip:
+                    # Resolve image relationships, then extract only the referenced images
+                    references, targets = self.read_image_references(docx_zip)
+                    images = self.extract_images_from_docx(docx_zip, doc_name, subfolder, settings,
+                                                           self.referenced_members(references, targets))
+                docx_file.seek(0)
+                images_by_hash = {img['hash']: img for img in images}
+                used_images = {}
                 
-                # Custom image converter to use our extracted images
+                # Custom image converter to use our extracted images. mammoth's traversal
+                # (vMerge cells, notes after the body) doesn't follow document order, so
+                # each image is matched by the sha256 of its bytes, the name it's stored under
                 def convert_image(image):
-                    nonlocal image_counter
-                    
-                    # Use sequential mapping if we have extracted images
-                    if images and image_counter < len(images):
-                        current_image = images[image_counter]
-                        print(f"   🔗 Image {image_counter + 1}: {current_image['original']} -> {current_image['relative_path']}")
-                        
-                        image_counter += 1
-                        return {
-                            "src": current_image['relative_path'],
-                            "alt": image.alt_text or current_image['original'].replace('.png', '').replace('.jpg', '').replace('image', 'Image ')
-                        }
+                    try:
+                        with image.open() as image_bytes:
+                            data = image_bytes.read()
+                    except Exception:
+                        data = None  # linked rather than embedded
                     
-                    # Try filename matching as backup
-                    if hasattr(image, 'src') and image.src:
-                        src_filename = Path(image.src).name
-                        for img_info in images:
-                            if img_info['original'] == src_filename:
-                                print(f"    Filename match: {src_filename} -> {img_info['relative_path']}")
-                                return {
-                                    "src": img_info['relative_path'],
-                                    "alt": image.alt_text or img_info['original']
-                                }
+                    img_info = None
+                    if data is not None:
+                        img_info = images_by_hash.get(hashlib.sha256(data).hexdigest())
+                        if img_info is None:
+                            ext = mimetypes.guess_extension(image.content_type or '') or ''
+                            img_info = self.store_image_bytes(data, '.jpg' if ext == '.jpe' else ext, settings)
+                            if img_info:
+                                images_by_hash[img_info['hash']] = img_info
                     
-                    # If we still have images available, cycle through them
-                    if images:
-                        cycle_index = image_counter % len(images)
-                        current_image = images[cycle_index]
-                        image_counter += 1
-                        print(f"    Cycling to image {cycle_index + 1}: {current_image['relative_path']}")
-                        return {
-                            "src": current_image['relative_path'],
-                            "alt": image.alt_text or f"Document Image {cycle_index + 1}"
+                    if img_info:
+                        used_images[img_info['hash']] = img_info
+                        print(f"   🔗 Image: {img_info['original']} -> {img_info['relative_path']}")
+                        attributes = {
+                            "src": img_info['relative_path'],
+                            "alt": image.alt_text or Path(img_info['original']).stem.replace('image', 'Image ')
                         }
+                        if img_info.get('srcset'):
+                            attributes["srcset"] = img_info['srcset']
+                        return attributes
                     
-                    # No images available - create placeholder
-                    print(f"    ⚠️ No images available, using placeholder")
+                    # Linked or missing image - create placeholder
+                    print(f"    ⚠️ No extracted image for {image.content_type or 'linked image'}, using placeholder")
                     return {
                         "src": f"/images/docx/{doc_name}_placeholder.png",
                         "alt": image.alt_text or "Image not found"
@@ -267,47 +665,39 @@ class DocxConverter:
                 )
                 
                 # Convert HTML to markdown using markdownify for better table support
-                try:
-                    from markdownify import markdownify as md
-                    markdown_content = md(result.value, heading_style="ATX")
-                except ImportError:
+                if MarkdownConverter:
+                    markdown_content = SrcsetMarkdownConverter(heading_style="ATX").convert(result.value)
+                else:
                     print("  ⚠️ markdownify not available, falling back to direct conversion")
-                    # Fallback to direct markdown conversion
+                    # Fallback to direct markdown conversion, a second pass over the same images
+                    docx_file.seek(0)
                     result_md = mammoth.convert_to_markdown(
                         docx_file,
                         convert_image=mammoth.images.img_element(convert_image)
                     )
                     markdown_content = result_md.value
                 
+                # Record only what the post shows; anything else extracted is left to gc_images
+                images = list(used_images.values())
+                
                 if result.messages:
                     print(f"  Conversion messages: {len(result.messages)} items")
                     for msg in result.messages:
                         print(f"    {msg.message}")
-                        
-                # Count images in the converted content
-                import re
-                image_count = len(re.findall(r'!\[.*?\]\(.*?\)', markdown_content))
-                print(f"  Images in markdown: {image_count}")
                 
         except Exception as e:
             print(f"  ❌ Error converting {docx_path}: {e}")
             return None
         
-        # Clean up the markdown
-        markdown_content = self.clean_markdown(markdown_content)
+        # Clean up the markdown, counting images, headings and tables on the way
+        markdown_content, stats = normalize_markdown(markdown_content)
+        print(f"  Images in markdown: {stats['images']}, headings: {stats['headings']}, tables: {stats['tables']}")
         
         # Get relative output path (preserves folder structure)
         relative_output_path = self.get_relative_output_path(docx_path)
         
-        # Get file creation time for more meaningful dates
-        file_stat = docx_path.stat()
-        # Use creation time (birth time) if available, otherwise use modification time
-        try:
-            creation_time = file_stat.st_birthtime  # macOS/BSD specific
-        except AttributeError:
-            creation_time = file_stat.st_mtime  # Fallback to modification time
-        
-        file_date = datetime.datetime.fromtimestamp(creation_time)
+        if file_date is None:
+            file_date = self.get_file_date(docx_path)
         date_str = file_date.strftime("%Y-%m-%d")
         date_time_str = file_date.strftime("%Y-%m-%d %H:%M:%S")
         
@@ -325,6 +715,10 @@ class DocxConverter:
         # Ensure the output directory exists
         self.ensure_directory_exists(output_path)
         
+        # Title and permalink are kept for the index page
+        title = doc_name.replace('-', ' ').replace('_', ' ').title()
+        permalink = f'/docx/{doc_name}/'
+        
         # Generate front matter using FrontMatterManager
         if self.fm_manager:
             try:
@@ -335,17 +729,19 @@ class DocxConverter:
                     images_count=len(images),
                     existing_content=""  # DOCX files don't have existing front matter
                 )
+                title = frontmatter_dict.get('title', doc_name)
+                permalink = permalink_override or frontmatter_dict.get('permalink', permalink)
                 
                 # Format front matter manually instead of using YAML
                 front_matter = f"""---
 layout: {frontmatter_dict.get('layout', 'post')}
-title: "{frontmatter_dict.get('title', doc_name)}"
+title: "{title}"
 date: {frontmatter_dict.get('date', date_time_str)}
 categories: {frontmatter_dict.get('categories', ['DOCX'])}
 tags: {frontmatter_dict.get('tags', ['docx', 'converted'])}
 author: {frontmatter_dict.get('author', 'Generated from DOCX')}
 description: "{frontmatter_dict.get('description', f'Converted from {docx_path.name}')}"
-permalink: {frontmatter_dict.get('permalink', f'/docx/{doc_name}/')}
+permalink: {permalink}
 ---
 
 """
@@ -357,15 +753,17 @@ permalink: {frontmatter_dict.get('permalink', f'/docx/{doc_name}/')}
         
         if not self.fm_manager:
             # Fallback to simple front matter
+            title = doc_name.replace('-', ' ').replace('_', ' ').title()
+            permalink = permalink_override or f'/docx/{doc_name}/'
             front_matter = f"""---
 layout: post
-title: "{doc_name.replace('-', ' ').replace('_', ' ').title()}"
+title: "{title}"
 date: {date_time_str} +0000
 categories: [DOCX]
 tags: [docx, converted]
 author: Generated from DOCX
 description: "Converted from {docx_path.name}"
-permalink: /docx/{doc_name}/
+permalink: {permalink}
 ---
 
 """
@@ -395,10 +793,249 @@ permalink: /docx/{doc_name}/
             'docx_path': docx_path,
             'markdown_path': output_path,
             'images': images,
-            'filename': filename
+            'filename': filename,
+            'date': date_time_str,
+            'title': title,
+            'permalink': permalink,
+            'subfolder': subfolder,
+            'stats': stats
+        }
+
+    def get_file_date(self, docx_path):
+        """Creation time (birth time) if available, otherwise modification time"""
+        file_stat = docx_path.stat()
+        try:
+            creation_time = file_stat.st_birthtime  # macOS/BSD specific
+        except AttributeError:
+            creation_time = file_stat.st_mtime  # Fallback to modification time
+        return datetime.datetime.fromtimestamp(creation_time)
+
+    @staticmethod
+    def file_hash(path):
+        """SHA-256 of a file's content, read in chunks"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def converter_hash(self):
+        """Hash of the conversion code and library versions that shape the output"""
+        digest = hashlib.sha256(CONVERTER_VERSION.encode())
+        digest.update(getattr(mammoth, '__version__', '').encode())
+        script_dir = Path(__file__).resolve().parent
+        for script in ('convert_docx.py', 'frontmatter_manager.py'):
+            script_path = script_dir / script
+            if script_path.exists():
+                digest.update(script_path.read_bytes())
+        return digest.hexdigest()
+
+    def load_manifest(self):
+        """Load the DOCX build manifest, starting fresh if the converter changed"""
+        converter = self.converter_hash()
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get('converter') != converter:
+            # Keep the document records so their outputs can still be cleaned up
+            for entry in manifest.get('documents', {}).values():
+                entry['hash'] = None
+            manifest['converter'] = converter
+        manifest.setdefault('documents', {})
+        return manifest
+
+    def save_manifest(self, manifest):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def manifest_key(self, docx_path):
+        try:
+            return str(Path(docx_path).relative_to(self.docx_dir))
+        except ValueError:
+            return str(docx_path)
+
+    def remove_outputs(self, entry, keep_markdown=None):
+        """Delete a document's recorded post unless it is still produced
+        
+        Images are shared between documents, so they are only removed by
+        gc_images once nothing references them.
+        """
+        markdown = entry.get('markdown')
+        if markdown and markdown != keep_markdown:
+            (self.base_dir / markdown).unlink(missing_ok=True)
+
+    def gc_images(self, manifest):
+        """Delete stored images no document in the manifest references
+        
+        Only files named by the content-addressed scheme are candidates, so
+        images from before the manifest existed or placed by hand are kept.
+        Call it after a full scan, when the manifest lists every document.
+        
+        Returns:
+            int: Bytes freed
+        """
+        referenced = {image for entry in manifest['documents'].values()
+                      for image in entry.get('images', [])}
+        removed = 0
+        freed = 0
+        for image_path in self.images_dir.iterdir():
+            if not image_path.is_file() or image_path.suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            if not STORED_IMAGE_RE.fullmatch(image_path.stem):
+                continue
+            if str(image_path.relative_to(self.base_dir)) not in referenced:
+                freed += image_path.stat().st_size
+                image_path.unlink()
+                removed += 1
+        if removed:
+            print(f"Removed {removed} unreferenced image(s), freed {freed:,} bytes")
+        return freed
+
+    def image_store_stats(self, manifest):
+        """Bytes referenced by all documents vs bytes actually stored
+        
+        Returns:
+            tuple: (referenced_bytes, stored_bytes); the difference is saved by deduplication
+        """
+        sizes = {}
+        referenced_bytes = 0
+        for entry in manifest['documents'].values():
+            for image in entry.get('images', []):
+                if image not in sizes:
+                    image_path = self.base_dir / image
+                    sizes[image] = image_path.stat().st_size if image_path.exists() else 0
+                referenced_bytes += sizes[image]
+        return referenced_bytes, sum(sizes.values())
+
+    def record_conversion(self, manifest, docx_path, result, file_hash, stat):
+        """Store a finished conversion and clean up outputs it replaced"""
+        key = self.manifest_key(docx_path)
+        markdown = str(result['markdown_path'].relative_to(self.base_dir))
+        # One reference per document, even if it embeds the same image twice
+        images = sorted({str(path.relative_to(self.base_dir))
+                         for img in result['images'] for path in img.get('files', [img['path']])})
+        old_entry = manifest['documents'].get(key)
+        if old_entry:
+            self.remove_outputs(old_entry, keep_markdown=markdown)
+        manifest['documents'][key] = {
+            'hash': file_hash,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'date': result['date'],
+            'markdown': markdown,
+            'images': images,
+            # Index page metadata, so the index never needs the documents reconverted
+            'title': result['title'],
+            'permalink': result['permalink'],
+            'subfolder': result['subfolder'],
+            'image_count': len(result['images']),
         }
 
-    def convert_all_docx(self, target_dir=None, force_regeneration=False):
+    def default_permalink(self, docx_path):
+        """
+        The permalink a document gets from config, or /docx/<name>/
+        
+        Returns:
+            tuple: (permalink, explicit) - explicit is True if _config.yml set it
+        """
+        doc_name = Path(docx_path).stem
+        if self.fm_manager:
+            configured = self.fm_manager.get_file_metadata(docx_path, doc_name).get('permalink')
+            if configured:
+                return configured, True
+        return f'/docx/{doc_name}/', False
+
+    def plan_permalinks(self, manifest, docx_files):
+        """
+        Choose permalinks for the documents about to be converted
+        
+        The manifest persists every converted document's permalink, so a
+        permalink -> source map built from it answers "is this taken?" with
+        one lookup per file. Documents that already own a permalink keep it,
+        including when they are reconverted by a forced rebuild. A newcomer
+        whose default permalink is taken is reported, and with
+        disambiguate_permalinks it gets its subfolder as a prefix
+        (/docx/D292/Intro-Doc/) instead. Top-level documents are planned
+        first, so they keep the short form.
+        
+        Returns:
+            dict: docx path -> permalink
+        """
+        converting = {self.manifest_key(f) for f in docx_files}
+        owners = {}
+        for key, entry in sorted(manifest['documents'].items()):
+            permalink = entry.get('permalink')
+            if not permalink:
+                continue
+            if permalink in owners:
+                # Collisions involving a document being converted are reported while planning it
+                if key not in converting and owners[permalink] not in converting:
+                    print(f"⚠️ Permalink collision: {permalink} is used by {owners[permalink]} and {key}")
+            else:
+                owners[permalink] = key
+        
+        ordered = sorted(docx_files, key=lambda f: (len(Path(self.manifest_key(f)).parts), str(f)))
+        defaults = {docx_file: self.default_permalink(docx_file) for docx_file in ordered}
+        
+        # Reconverted documents keep the permalink they own while it is still theirs to claim
+        planned = {}
+        for docx_file in ordered:
+            key = self.manifest_key(docx_file)
+            recorded = manifest['documents'].get(key, {}).get('permalink')
+            permalink, explicit = defaults[docx_file]
+            if recorded and owners.get(recorded) == key and (
+                    recorded == permalink or (not explicit and recorded == self.prefixed_permalink(docx_file))):
+                planned[docx_file] = recorded
+        
+        # Release what the others owned, their config may have moved them elsewhere
+        releasing = {self.manifest_key(f) for f in ordered if f not in planned}
+        owners = {permalink: key for permalink, key in owners.items() if key not in releasing}
+        
+        for docx_file in ordered:
+            if docx_file in planned:
+                continue
+            key = self.manifest_key(docx_file)
+            permalink, explicit = defaults[docx_file]
+            if owners.get(permalink, key) != key:
+                top_level = len(Path(key).parts) == 1
+                if self.disambiguate_permalinks and not explicit and not top_level:
+                    prefixed = self.prefixed_permalink(docx_file)
+                    print(f"⚠️ Permalink {permalink} is taken by {owners[permalink]}; using {prefixed} for {key}")
+                    permalink = prefixed
+                elif explicit:
+                    print(f"⚠️ Permalink collision: {permalink} is used by {owners[permalink]} and {key} "
+                          f"(set in _config.yml, change it there)")
+                elif top_level:
+                    print(f"⚠️ Permalink collision: {permalink} is used by {owners[permalink]} and {key}; "
+                          f"it can't be resolved automatically, since {key} has no subfolder to prefix. "
+                          f"Rename one of them or set a permalink in _config.yml")
+                else:
+                    print(f"⚠️ Permalink collision: {permalink} is used by {owners[permalink]} and {key} "
+                          f"(use --disambiguate-permalinks to prefix the subfolder)")
+            owners.setdefault(permalink, key)
+            planned[docx_file] = permalink
+        return planned
+
+    def prefixed_permalink(self, docx_file):
+        """Default permalink with the document's subfolder in front, /docx/D292/Intro-Doc/"""
+        subfolder = Path(self.manifest_key(docx_file)).parent.as_posix()
+        return f"/docx/{subfolder}/{Path(docx_file).stem}/"
+
+    def remove_deleted_documents(self, manifest, docx_files):
+        """Drop outputs of documents that no longer exist in _docx"""
+        present = {self.manifest_key(f) for f in docx_files}
+        for key in list(manifest['documents']):
+            if key not in present:
+                print(f"Removing outputs of deleted document: {key}")
+                self.remove_outputs(manifest['documents'].pop(key))
+                self.removed_documents += 1
+
+    def convert_all_docx(self, target_dir=None, force_regeneration=False, docx_files=None):
         """Convert all DOCX files in the _docx directory (including subdirectories)
         
         Args:
@@ -406,13 +1043,20 @@ permalink: /docx/{doc_name}/
                                       If provided, only converts files in that directory.
             force_regeneration (bool, optional): If True, regenerate files even if they appear up-to-date.
                                                Used when config files change.
+            docx_files (list, optional): Explicit DOCX files to convert instead of scanning _docx.
         """
         if not self.docx_dir.exists():
             print(f"❌ DOCX directory not found: {self.docx_dir}")
             return []
         
+        # Deleted documents can only be detected from a listing of the whole tree
+        full_scan = docx_files is None and not target_dir
+        
         # Use recursive glob to find all DOCX files
-        if target_dir:
+        if docx_files is not None:
+            target_dir = None
+            docx_files = sorted(Path(f).resolve() for f in docx_files if Path(f).exists())
+        elif target_dir:
             # Convert relative path to absolute and verify it's within _docx
             target_path = self.docx_dir / target_dir
             if not target_path.exists():
@@ -430,6 +1074,11 @@ permalink: /docx/{doc_name}/
         if not docx_files:
             search_location = target_path if target_dir else self.docx_dir
             print(f"No DOCX files found in {search_location} (including subdirectories)")
+            if full_scan:
+                manifest = self.load_manifest()
+                self.remove_deleted_documents(manifest, [])
+                self.save_manifest(manifest)
+                self.gc_images(manifest)
             return []
         
         search_location = target_path if target_dir else self.docx_dir
@@ -439,67 +1088,61 @@ permalink: /docx/{doc_name}/
         skipped_count = 0
         converted_count = 0
         
+        manifest = self.load_manifest()
+        if full_scan:
+            self.remove_deleted_documents(manifest, docx_files)
+        
         # Separate files that need conversion from those that can be skipped
         files_to_convert = []
+        pending = {}
         for docx_file in docx_files:
             # Skip temporary files (start with ~$)
             if docx_file.name.startswith('~$'):
                 continue
-                
-            # Get subfolder context for filename generation
-            try:
-                relative_to_docx = docx_file.relative_to(self.docx_dir)
-                subfolder = str(relative_to_docx.parent) if relative_to_docx.parent != Path('.') else ""
-            except ValueError:
-                subfolder = ""
-            
-            # Check if conversion is needed based on file timestamps
-            doc_name = docx_file.stem
-            
-            # Get file creation time for consistent filename generation
-            file_stat = docx_file.stat()
-            try:
-                creation_time = file_stat.st_birthtime  # macOS/BSD specific
-            except AttributeError:
-                creation_time = file_stat.st_mtime  # Fallback to modification time
-            
-            file_date = datetime.datetime.fromtimestamp(creation_time)
-            date_str = file_date.strftime("%Y-%m-%d")
             
-            # Generate expected filename with subfolder context
-            if subfolder:
-                folder_prefix = subfolder.replace(os.sep, "_").replace("/", "_")
-                expected_filename = f"{date_str}-{folder_prefix}_{doc_name}_DOCX_.md"
-            else:
-                expected_filename = f"{date_str}-{doc_name}_DOCX_.md"
-                
-            expected_output = self.posts_dir / expected_filename
+            # Check if conversion is needed based on content hash; the hash is
+            # only recomputed when size or mtime differ from the manifest
+            key = self.manifest_key(docx_file)
+            entry = manifest['documents'].get(key)
+            stat = docx_file.stat()
+            output_exists = bool(entry) and (self.base_dir / entry['markdown']).exists()
             
-            if expected_output.exists() and not force_regeneration:
-                docx_mtime = docx_file.stat().st_mtime
-                output_mtime = expected_output.stat().st_mtime
-                
-                if docx_mtime <= output_mtime:
+            if entry and output_exists and not force_regeneration and entry['hash']:
+                unchanged = entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+                if not unchanged and self.file_hash(docx_file) == entry['hash']:
+                    # Touched or re-copied but identical content
+                    entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime
+                    unchanged = True
+                if unchanged:
                     skipped_count += 1
                     # Still add to results for index page generation, but mark as skipped
                     results.append({
                         'docx_path': docx_file,
-                        'markdown_path': expected_output,
+                        'markdown_path': self.base_dir / entry['markdown'],
                         'images': None,  # Mark as skipped with None
-                        'filename': expected_output.name,
+                        'filename': Path(entry['markdown']).name,
                         'skipped': True
                     })
                     continue
             
+            # Keep the post date (and so its filename) stable across edits
+            file_date = None
+            if entry and entry.get('date'):
+                file_date = datetime.datetime.strptime(entry['date'], "%Y-%m-%d %H:%M:%S")
+            pending[docx_file] = (self.file_hash(docx_file), stat, file_date)
             files_to_convert.append(docx_file)
         
+        # Settle permalinks up front; workers can't see each other's choices
+        permalinks = self.plan_permalinks(manifest, files_to_convert)
+        
         # Convert files in parallel if there are multiple files
-        if len(files_to_convert) > 1:
+        if len(files_to_convert) > 1 and self.jobs > 1:
             print(f"Converting {len(files_to_convert)} files in parallel...")
-            with ThreadPoolExecutor(max_workers=min(4, len(files_to_convert))) as executor:
+            with self.create_executor(min(self.jobs, len(files_to_convert))) as executor:
                 # Submit all conversion tasks
+                convert = self.convert_docx_to_markdown if self.use_threads else convert_in_worker
                 future_to_file = {
-                    executor.submit(self.convert_docx_to_markdown, docx_file): docx_file 
+                    executor.submit(convert, docx_file, pending[docx_file][2], permalinks[docx_file]): docx_file 
                     for docx_file in files_to_convert
                 }
                 
@@ -509,6 +1152,8 @@ permalink: /docx/{doc_name}/
                     try:
                         result = future.result()
                         if result:
+                            file_hash, stat, _ = pending[docx_file]
+                            self.record_conversion(manifest, docx_file, result, file_hash, stat)
                             results.append(result)
                             converted_count += 1
                             print(f"✅ Completed: {docx_file.name}")
@@ -517,19 +1162,51 @@ permalink: /docx/{doc_name}/
         else:
             # Single file or no files - use sequential processing
             for docx_file in files_to_convert:
-                result = self.convert_docx_to_markdown(docx_file)
+                file_hash, stat, file_date = pending[docx_file]
+                result = self.convert_docx_to_markdown(docx_file, file_date, permalinks[docx_file])
                 if result:
+                    self.record_conversion(manifest, docx_file, result, file_hash, stat)
                     results.append(result)
                     converted_count += 1
         
+        self.save_manifest(manifest)
+        if full_scan:
+            # Partial runs don't see every document, so they never collect images
+            self.gc_images(manifest)
+        self.manifest = manifest
         return results
 
-    def create_index_page(self, results):
-        """Create an index page for all converted documents"""
-        if not results:
-            return
+    def create_executor(self, workers, quiet=False):
+        """Pool for convert_all_docx; mammoth/markdownify are CPU-bound, so processes by default"""
+        if self.use_threads:
+            return ThreadPoolExecutor(max_workers=workers)
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(self.docx_dir, self.posts_dir, self.images_dir, quiet)
+        )
+
+    def create_index_page(self, manifest=None):
+        """
+        Write docx-index.md from the manifest, grouped by subfolder
         
-        index_content = f"""---
+        The page only depends on recorded document metadata (no timestamps),
+        and it is only rewritten when its content changes, so runs that
+        convert nothing new don't touch it and don't trigger a Jekyll rebuild.
+        
+        Returns:
+            bool: True if the index was written
+        """
+        manifest = manifest or self.manifest or self.load_manifest()
+        
+        groups = {}
+        for key, entry in manifest['documents'].items():
+            # Manifest keys are paths relative to _docx, so the parent is the subfolder
+            parent = Path(key).parent
+            subfolder = entry.get('subfolder', "" if parent == Path('.') else str(parent))
+            groups.setdefault(subfolder, []).append((key, entry))
+        
+        index_content = """---
 layout: page
 title: "DOCX Documents"
 permalink: /docx/
@@ -540,26 +1217,25 @@ description: "Converted documents from DOCX files"
 
 This page contains documents converted from DOCX files.
 
-*Last updated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
-
 ## Available Documents
 
 """
         
-        # Sort results by filename for consistent ordering
-        sorted_results = sorted(results, key=lambda x: x['docx_path'].name)
-        
-        for result in sorted_results:
-            doc_title = result['docx_path'].stem.replace('-', ' ').replace('_', ' ').title()
-            doc_name = result['docx_path'].stem
-            post_url = f"/docx/{doc_name}/"
-            
-            index_content += f"""
+        # Top-level documents first, then subfolders; filenames sort within each
+        for subfolder in sorted(groups, key=lambda folder: (folder != "", folder)):
+            if subfolder:
+                index_content += f"\n## {subfolder}\n"
+            for key, entry in sorted(groups[subfolder], key=lambda item: Path(item[0]).name):
+                doc_name = Path(key).stem
+                doc_title = entry.get('title') or doc_name.replace('-', ' ').replace('_', ' ').title()
+                post_url = entry.get('permalink') or f"/docx/{doc_name}/"
+                
+                index_content += f"""
 ### [{doc_title}]({post_url})
 
-- **Source**: `{result['docx_path'].name}`
-- **Images**: {len(result.get('images') or [])} extracted
-- **Generated**: {datetime.datetime.now().strftime("%Y-%m-%d")}
+- **Source**: `{Path(key).name}`
+- **Images**: {entry.get('image_count', len(entry.get('images', [])))} extracted
+- **Generated**: {(entry.get('date') or '')[:10]}
 
 """
         
@@ -581,10 +1257,183 @@ These documents were automatically converted from DOCX format using a two-step p
 *Note: Original DOCX files are maintained in the `_docx` directory and excluded from the published site.*
 """
         
-        # Write index page
+        # Write index page only if it changed, atomically
         index_path = self.base_dir / "docx-index.md"
-        with open(index_path, 'w', encoding='utf-8') as index_file:
+        if not manifest['documents']:
+            # Also empty without _docx or before the first manifest; the page is
+            # only dropped once every document it listed has been deleted
+            if self.removed_documents and index_path.exists():
+                index_path.unlink()
+                return True
+            return False
+        try:
+            if index_path.read_text(encoding='utf-8') == index_content:
+                return False
+        except OSError:
+            pass
+        temp_path = index_path.with_name(f".{index_path.name}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as index_file:
             index_file.write(index_content)
+        os.replace(temp_path, index_path)
+        return True
+
+# Per-process converter for ProcessPoolExecutor workers, built once by init_worker
+_worker_converter = None
+
+def init_worker(docx_dir, posts_dir, images_dir, quiet=False):
+    """Process pool initializer: one DocxConverter (and FrontMatterManager) per worker"""
+    global _worker_converter
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    _worker_converter = DocxConverter(docx_dir, posts_dir, images_dir, jobs=1)
+
+def convert_in_worker(docx_path, file_date=None, permalink=None):
+    return _worker_converter.convert_docx_to_markdown(docx_path, file_date, permalink)
+
+def transcode_image(source_path, stem, ext, settings):
+    """
+    Re-encode one image, capping its width and writing srcset variants
+    
+    Module level so it can run in a ProcessPoolExecutor. Outputs are written
+    to a temp name and moved into place, so a reader never sees a partial file.
+    Animated images keep every frame and its timing; JPEG can't animate, so
+    it gets the first frame only.
+    
+    Returns:
+        tuple: (image_path, width, [(variant_width, variant_path), ...])
+    """
+    def save(frames, path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        first = frames[0]
+        animation = {}
+        if len(frames) > 1 and ext != '.jpg':
+            animation = {'save_all': True, 'append_images': frames[1:], 'duration': durations, 'loop': loop}
+        if ext == '.webp':
+            first.save(temp_path, 'WEBP', quality=settings['quality'], method=6, **animation)
+        elif ext == '.png':
+            first.save(temp_path, 'PNG', optimize=True, **animation)
+        elif ext == '.jpg':
+            first.convert('RGB').save(temp_path, 'JPEG', quality=settings['quality'], optimize=True, progressive=True)
+        else:
+            first.save(temp_path, Image.registered_extensions()[ext], **animation)
+        os.replace(temp_path, path)
+    
+    def resize(frames, width):
+        height = round(frames[0].height * width / frames[0].width)
+        return [frame.resize((width, height), Image.LANCZOS) for frame in frames]
+    
+    with Image.open(source_path) as im:
+        im.load()
+        # save() alone would keep only the first frame of an animated GIF
+        # GIF frames mix palette and RGB modes, so animations share one mode
+        frames = ([frame.convert('RGBA') for frame in ImageSequence.Iterator(im)]
+                  if getattr(im, 'is_animated', False) else [im])
+        durations = [frame.info.get('duration', 100) for frame in frames]
+        loop = im.info.get('loop', 0)
+        frames = [frame if frame.mode in ('RGB', 'RGBA', 'L', 'LA', 'P')
+                  else frame.convert('RGBA' if 'A' in frame.getbands() else 'RGB') for frame in frames]
+        max_width = settings.get('max_width')
+        if max_width and frames[0].width > max_width:
+            frames = resize(frames, max_width)
+        
+        image_path = f"{stem}{ext}"
+        save(frames, image_path)
+        
+        width = frames[0].width
+        variants = []
+        for variant_width in settings['srcset']:
+            if variant_width < width:
+                variant_path = f"{stem}-{variant_width}w{ext}"
+                save(resize(frames, variant_width), variant_path)
+                variants.append((variant_width, variant_path))
+        return image_path, width, variants
+
+def make_synthetic_docx(path, paragraphs=400):
+    """Write a minimal but valid DOCX with headings, paragraphs and list items"""
+    body = []
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            body.append(f'<w:p><w:pPr><w:pStyle w:val="Heading2"/></w:pPr><w:r><w:t>Section {i // 20}</w:t></w:r></w:p>')
+        body.append(f'<w:p><w:r><w:t>Paragraph {i} of lecture notes with enough text to convert.</w:t></w:r>'
+                    f'<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve"> Bold part {i}.</w:t></w:r></w:p>')
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{"".join(body)}</w:body></w:document>')
+    content_types = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                     '<Default Extension="xml" ContentType="application/xml"/>'
+                     '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                     '</Types>')
+    rels = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+            '</Relationships>')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', content_types)
+        docx.writestr('_rels/.rels', rels)
+        docx.writestr('word/document.xml', document)
+
+def benchmark_executors(count=40, jobs=None):
+    """Time a full conversion of a synthetic corpus with a thread pool vs a process pool"""
+    jobs = jobs or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        docx_dir = work_dir / "_docx"
+        docx_dir.mkdir()
+        for i in range(count):
+            make_synthetic_docx(docx_dir / f"lecture-{i:03d}.docx")
+        
+        timings = {}
+        for label, use_threads in (("threads", True), ("processes", False)):
+            converter = DocxConverter(docx_dir, work_dir / "_posts", work_dir / "images",
+                                      work_dir / f"{label}.manifest", jobs=jobs, use_threads=use_threads)
+            files = sorted(docx_dir.glob("*.docx"))
+            start = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                with converter.create_executor(jobs, quiet=True) as executor:
+                    convert = converter.convert_docx_to_markdown if use_threads else convert_in_worker
+                    list(executor.map(convert, files))
+            timings[label] = time.perf_counter() - start
+    
+    print(f"Synthetic DOCX files: {count}, workers: {jobs}")
+    for label, seconds in timings.items():
+        print(f"  {label:<10} {seconds:6.2f}s  ({seconds / count * 1000:.0f} ms/file)")
+    print(f"  Speedup: {timings['threads'] / timings['processes']:.1f}x")
+
+def make_synthetic_markdown(size_bytes):
+    """markdownify-style output of roughly size_bytes: headings, prose, lists, tables, images"""
+    block = ("## Section heading\n"
+             "Paragraph of lecture notes with *emphasis*, a C# mention and enough text to wrap.\n"
+             "\n\n\n"
+             "* first bullet\n* second bullet\n1. numbered item\n"
+             "| Column A | Column B |\n| --- | --- |\n| cell | cell |\n"
+             "![Image 1](/images/docx/example.png)\n"
+             "   \n\n")
+    return block * max(1, size_bytes // len(block))
+
+def benchmark_clean_markdown(sizes_mb=(1, 2, 4, 8)):
+    """Time normalize_markdown on multi-megabyte documents to show it scales linearly"""
+    def regex_passes(markdown_text):
+        # The previous four-pass implementation, for comparison
+        markdown_text = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown_text)
+        markdown_text = re.sub(r'\n(#{1,6})', r'\n\n\1', markdown_text)
+        markdown_text = re.sub(r'(#{1,6}.*?)\n([^\n#])', r'\1\n\n\2', markdown_text)
+        markdown_text = re.sub(r'\n(\*|\d+\.)', r'\n\n\1', markdown_text)
+        return markdown_text.strip()
+    
+    print(f"{'size':>6} {'single pass':>12} {'ms/MB':>7} {'regex passes':>13} {'ms/MB':>7}")
+    for size_mb in sizes_mb:
+        text = make_synthetic_markdown(size_mb << 20)
+        timings = []
+        for clean in (normalize_markdown, regex_passes):
+            start = time.perf_counter()
+            clean(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{size_mb:>4}MB {timings[0]:>10.0f}ms {timings[0] / size_mb:>7.0f} "
+              f"{timings[1]:>11.0f}ms {timings[1] / size_mb:>7.0f}")
+    _, stats = normalize_markdown(make_synthetic_markdown(1 << 20))
+    print(f"Stats for 1MB: {stats}")
 
 def main():
     parser = argparse.ArgumentParser(description='Convert DOCX files to Jekyll markdown')
@@ -592,9 +1441,26 @@ def main():
                        help='Specific subdirectory within _docx to target for conversion')
     parser.add_argument('--config-changed', '-c', type=str,
                        help='Config file that changed (automatically determines target directory)')
+    parser.add_argument('files', nargs='*',
+                       help='Specific DOCX files to convert (default: everything in _docx)')
+    parser.add_argument('--disambiguate-permalinks', action='store_true',
+                       help='Prefix colliding default permalinks with the document subfolder')
+    parser.add_argument('--jobs', '-j', type=int,
+                       help='Number of conversion processes (default: CPU count)')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                       help='Compare thread vs process pools on N synthetic DOCX files and exit')
+    parser.add_argument('--benchmark-cleanup', type=int, nargs='*', metavar='MB',
+                       help='Time markdown cleanup on synthetic documents of these sizes (default: 1 2 4 8) and exit')
     
     args = parser.parse_args()
     
+    if args.benchmark:
+        benchmark_executors(args.benchmark, args.jobs)
+        return
+    if args.benchmark_cleanup is not None:
+        benchmark_clean_markdown(args.benchmark_cleanup or (1, 2, 4, 8))
+        return
+    
     target_dir = None
     force_regeneration = False
     
@@ -617,16 +1483,24 @@ def main():
     elif args.target_dir:
         target_dir = args.target_dir
     
-    converter = DocxConverter()
-    results = converter.convert_all_docx(target_dir, force_regeneration)
+    converter = DocxConverter(jobs=args.jobs, disambiguate_permalinks=args.disambiguate_permalinks)
+    results = converter.convert_all_docx(target_dir, force_regeneration, args.files or None)
     
     # Only count files that were actually converted (not skipped)
     converted_files = [r for r in results if not r.get('skipped', False)]
     
+    # Built from the manifest, so it lists every document and is only
+    # rewritten when something it shows changed
+    converter.create_index_page()
+    
     if converted_files:
-        converter.create_index_page(results)
         print(f"Converted: {len(converted_files)} documents")
-        print(f"Images: {sum(len(r.get('images', [])) for r in converted_files)} extracted")
+        extracted = [img for r in converted_files for img in r.get('images', [])]
+        written = sum(1 for img in extracted if img.get('written'))
+        print(f"Images: {len(extracted)} extracted, {written} written, {len(extracted) - written} reused from the image store")
+        referenced_bytes, stored_bytes = converter.image_store_stats(converter.manifest)
+        print(f"Image store: {stored_bytes:,} bytes on disk for {referenced_bytes:,} bytes referenced "
+              f"({referenced_bytes - stored_bytes:,} bytes saved by deduplication)")
     elif not results:
         # Only show this if no DOCX files exist at all
         if not converter.docx_dir.exists() or not list(converter.docx_dir.glob("*.docx")):
@@ -1,23 +1,56 @@
 import glob
-from nbconvert import MarkdownExporter
-from nbconvert.utils.exceptions import ConversionException
+import argparse
 import os
-import nbformat
 import yaml
 import sys
 import subprocess
+import json
+import socket
+import socketserver
+import time
+import shutil
+import tempfile
 from hashlib import sha256
 import concurrent.futures, traceback, re
 
 if __name__ == "__main__":
     from progress_bar import ProgressBar
+    from frontmatter_manager import load_frontmatter_yaml
 else:
     from scripts.progress_bar import ProgressBar
+    from scripts.frontmatter_manager import load_frontmatter_yaml
+
+# nbconvert and nbformat are imported where they are used, so a client that
+# only hands work to the conversion daemon starts without loading them
 
 
 notebook_directory = "_notebooks"
 destination_directory = "_posts"
 mermaid_output_directory = "assets/mermaid"
+manifest_path = ".cache/notebooks.manifest"
+daemon_socket_path = ".cache/convert_notebooks.sock"
+mermaid_index_path = ".cache/mermaid.index.json"
+
+# Bump when the output format changes in a way the source hash can't see
+CONVERTER_VERSION = "1"
+
+# traitlets config for MarkdownExporter and its preprocessors, for example
+# {"MarkdownExporter": {"exclude_output": True}}; part of the converter hash
+exporter_config = {}
+
+# mmdc settings, part of every diagram's cache key so changing them re-renders.
+# SVG keeps pages light; diagrams that fail as SVG fall back to PNG
+mermaid_render_options = {"format": "svg", "scale": 10, "theme": "default", "background": "white"}
+
+# Embed SVG markup directly in the post instead of linking the image file
+mermaid_inline_svg = False
+
+# Diagrams per mmdc run and how many mmdc runs (headless browsers) at once
+mermaid_batch_size = 25
+mermaid_concurrency = 2
+
+# One MarkdownExporter per process, built by init_exporter
+_exporter = None
 
 
 def error_cleanup(notebook_file):
@@ -34,7 +67,7 @@ def extract_front_matter(notebook_file, cell):
 
     if source.startswith("---"):
         try:
-            front_matter = yaml.safe_load(source.split("---", 2)[1])
+            front_matter = load_frontmatter_yaml(source.split("---", 2)[1])
         except yaml.YAMLError as e:
             print(f"Error parsing YAML front matter: {e}")
             error_cleanup(notebook_file)
@@ -64,14 +97,56 @@ def fix_js_code_blocks(markdown):
     return markdown
 
 
+def init_exporter(config=None):
+    """
+    Build this process's MarkdownExporter once.
+
+    Used as the process pool initializer so each worker compiles the Jinja
+    templates a single time instead of once per notebook.
+    """
+    global _exporter, exporter_config
+    from nbconvert import MarkdownExporter
+    from traitlets.config import Config
+
+    if config is not None:
+        exporter_config = config
+    _exporter = MarkdownExporter(config=Config(exporter_config))
+    return _exporter
+
+
+def init_worker(config, render_options, inline_svg):
+    """Process pool initializer: carry CLI settings over and warm the exporter"""
+    global mermaid_inline_svg
+    mermaid_render_options.update(render_options)
+    mermaid_inline_svg = inline_svg
+    init_exporter(config)
+
+
+def get_exporter():
+    if _exporter is None:
+        return init_exporter()
+    return _exporter
+
+
+def load_exporter_config(config_file):
+    """Load exporter options from a YAML/JSON file into exporter_config"""
+    global exporter_config
+    with open(config_file, "r", encoding="utf-8") as file:
+        exporter_config = yaml.safe_load(file) or {}
+    return exporter_config
+
+
 # Function to convert the notebook to Markdown with front matter
-def convert_notebook_to_markdown_with_front_matter(notebook_file):
+def convert_notebook_to_markdown_with_front_matter(notebook_file, exporter=None):
+    import nbformat
+
     with open(notebook_file, "r", encoding="utf-8") as file:
         notebook = nbformat.read(file, as_version=nbformat.NO_CONVERT)
         front_matter = extract_front_matter(notebook_file, notebook.cells[0])
         notebook.cells.pop(0)
         process_mermaid_cells(notebook)
-        exporter = MarkdownExporter()
+        if exporter is None:
+            exporter = get_exporter()
         markdown, _ = exporter.from_notebook_node(notebook)
         markdown = fix_js_code_blocks(markdown) # Fix JS code blocks
         front_matter_content = (
@@ -87,55 +162,429 @@ def convert_notebook_to_markdown_with_front_matter(notebook_file):
 
 
 # Function to convert the Jupyter Notebook files to Markdown
-def convert_single_notebook(notebook_file):
+def convert_single_notebook(notebook_file, exporter=None):
+    from nbconvert.utils.exceptions import ConversionException
+
     try:
-        convert_notebook_to_markdown_with_front_matter(notebook_file)
+        convert_notebook_to_markdown_with_front_matter(notebook_file, exporter)
     except ConversionException as e:
         print(f"Conversion error for {notebook_file}: {str(e)}")
         error_cleanup(notebook_file)
         sys.exit(1)
 
 
-def process_notebook(notebook_file):
+def process_notebook(notebook_file, exporter=None):
+    from nbconvert.utils.exceptions import ConversionException
+
     try:
-        convert_single_notebook(notebook_file)
+        convert_single_notebook(notebook_file, exporter)
+        return True
     except ConversionException as e:
         print(f"Conversion error for {notebook_file}: {str(e)}")
         error_cleanup(notebook_file)
+    except SystemExit:
+        # Error already reported, don't take down the pool or daemon
+        pass
     except Exception as e:
         print(f"Unexpected error for {notebook_file}: {traceback.format_exc()}")
+    return False
 
 
-def convert_notebooks():
-    maxCores = os.cpu_count()  # get the number of cores available on the system
+# BUILD MANIFEST =========
+def converter_hash():
+    """Hash of everything besides the notebook itself that shapes the output"""
+    digest = sha256()
+    digest.update(CONVERTER_VERSION.encode())
+    for library_version in library_versions().values():
+        digest.update(library_version.encode())
+    digest.update(json.dumps(exporter_config, sort_keys=True).encode())
+    digest.update(json.dumps([mermaid_render_options, mermaid_inline_svg], sort_keys=True).encode())
+    with open(__file__, "rb") as file:
+        digest.update(file.read())
+    return digest.hexdigest()
+
+
+def code_hash():
+    """Hash of this converter's code; a daemon running other code must restart"""
+    digest = sha256()
+    digest.update(CONVERTER_VERSION.encode())
+    with open(__file__, "rb") as file:
+        digest.update(file.read())
+    return digest.hexdigest()
+
+
+def library_versions():
+    # importlib.metadata is slow to import, and daemon clients never need it
+    from importlib.metadata import version
+    return {"nbconvert": version("nbconvert"), "nbformat": version("nbformat")}
+
+
+def conversion_options():
+    """Per-run settings that shape the output, compared as JSON by the daemon"""
+    return json.loads(json.dumps({
+        "exporter_config": exporter_config,
+        "mermaid_render_options": mermaid_render_options,
+        "mermaid_inline_svg": mermaid_inline_svg,
+    }))
+
 
-    notebook_files = glob.glob(f"{notebook_directory}/**/*.ipynb", recursive=True)
+def file_hash(path):
+    digest = sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {"converter": None, "notebooks": {}}
+    manifest.setdefault("notebooks", {})
+    return manifest
+
+
+def save_manifest(manifest):
+    ensure_directory_exists(manifest_path)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def find_stale_notebooks(notebook_files, manifest, force=False):
+    """
+    Split notebooks into those needing conversion and those unchanged.
+
+    A notebook is unchanged when its content hash matches the manifest, the
+    converter hash matches, and its output still exists. The hash is only
+    recomputed when size or mtime differ from what the manifest recorded.
+
+    Returns:
+    - list: (notebook_file, entry) pairs to convert, entry is the new manifest record
+    """
+    current_converter = converter_hash()
+    if manifest.get("converter") != current_converter:
+        # Every recorded output came from an older converter
+        manifest["converter"] = current_converter
+        manifest["notebooks"] = {}
+
+    entries = manifest["notebooks"]
+    stale = []
+    for notebook_file in notebook_files:
+        stat = os.stat(notebook_file)
+        output_path = get_relative_output_path(notebook_file)
+        entry = entries.get(notebook_file)
+        if (
+            not force
+            and entry
+            and entry["size"] == stat.st_size
+            and entry["mtime"] == stat.st_mtime
+            and os.path.exists(output_path)
+        ):
+            continue
+
+        new_entry = {
+            "hash": file_hash(notebook_file),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "output": output_path,
+        }
+        if (
+            not force
+            and entry
+            and entry["hash"] == new_entry["hash"]
+            and os.path.exists(output_path)
+        ):
+            # Touched but not changed, refresh the recorded stat and the
+            # output mtime so make no longer sees the target as stale
+            entries[notebook_file] = new_entry
+            os.utime(output_path)
+            continue
+        stale.append((notebook_file, new_entry))
+    return stale
+
+
+def remove_orphaned_outputs(notebook_files, manifest):
+    """Delete converted markdown whose source notebook no longer exists"""
+    expected = {get_relative_output_path(f) for f in notebook_files}
+    for notebook_file in list(manifest["notebooks"]):
+        if notebook_file not in notebook_files:
+            del manifest["notebooks"][notebook_file]
+
+    removed = 0
+    for output_path in glob.glob(
+        f"{destination_directory}/**/*_IPYNB_2_.md", recursive=True
+    ):
+        if output_path not in expected:
+            os.remove(output_path)
+            removed += 1
+    if removed:
+        print(f"Removed {removed} orphaned notebook output(s)")
+
+
+def prune_orphaned_outputs():
+    """Remove outputs of deleted notebooks without converting anything"""
+    manifest = load_manifest()
+    remove_orphaned_outputs(set(list_notebooks()), manifest)
+    save_manifest(manifest)
+
+
+def list_notebooks():
+    return sorted(glob.glob(f"{notebook_directory}/**/*.ipynb", recursive=True))
+
+
+def normalize_notebook_paths(paths):
+    """Make paths relative to the repo root so they match manifest keys"""
+    notebook_files = []
+    for path in paths:
+        path = os.path.relpath(os.path.abspath(path))
+        if not path.endswith(".ipynb"):
+            print(f"Skipping non-notebook file: {path}")
+        elif not os.path.exists(path):
+            print(f"Notebook not found: {path}")
+        else:
+            notebook_files.append(path)
+    return sorted(set(notebook_files))
+
+
+def notebooks_changed_since(since):
+    """
+    List notebooks changed since a reference point.
+
+    Parameters:
+    - since (str): an existing file (its mtime is the cutoff) or a git revision
+
+    Returns:
+    - list: notebook paths that changed after the reference point
+    """
+    if os.path.exists(since):
+        cutoff = os.stat(since).st_mtime
+        return [f for f in list_notebooks() if os.stat(f).st_mtime > cutoff]
+
+    changed = subprocess.run(
+        ["git", "diff", "--name-only", since, "--", notebook_directory],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    untracked = subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard", "--", notebook_directory],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return normalize_notebook_paths(
+        f for f in changed + untracked if f.endswith(".ipynb") and os.path.exists(f)
+    )
+
+
+def run_conversions(executor, pending, manifest):
+    """Convert pending notebooks on the executor, recording successes in the manifest"""
+    converted = []
 
     # create progress bar
     convertBar = ProgressBar(
-        userInfo="Notebook conversion progress:", total=(len(notebook_files))
+        userInfo="Notebook conversion progress:", total=(len(pending))
     )
 
-    with concurrent.futures.ProcessPoolExecutor(max_workers=maxCores) as executor:
-        futures = {
-            executor.submit(process_notebook, notebook_file): notebook_file
-            for notebook_file in notebook_files
-        }
+    futures = {
+        executor.submit(process_notebook, notebook_file): notebook_file
+        for notebook_file in pending
+    }
 
-        for future in concurrent.futures.as_completed(futures):
-            notebook_file = futures[future]
-            try:
-                future.result()
-            except Exception as e:
-                print(
-                    f"Error occurred during notebook processing: {notebook_file}\n{traceback.format_exc()}"
-                )
-            finally:
-                rel_path = os.path.relpath(notebook_file, notebook_directory)
-                convertBar.set_suffix(rel_path)
-                convertBar.continue_progress()
+    for future in concurrent.futures.as_completed(futures):
+        notebook_file = futures[future]
+        try:
+            if future.result():
+                manifest["notebooks"][notebook_file] = pending[notebook_file]
+                converted.append(notebook_file)
+        except Exception as e:
+            print(
+                f"Error occurred during notebook processing: {notebook_file}\n{traceback.format_exc()}"
+            )
+        finally:
+            rel_path = os.path.relpath(notebook_file, notebook_directory)
+            convertBar.set_suffix(rel_path)
+            convertBar.continue_progress()
 
     convertBar.end_progress()
+    return converted
+
+
+def convert_notebooks(notebook_files=None, force=False, use_daemon=True):
+    """
+    Convert notebooks to markdown posts in a single process pool.
+
+    Parameters:
+    - notebook_files (list): notebooks to convert, defaults to the whole _notebooks tree
+    - force (bool): convert even when the manifest says a notebook is unchanged
+    - use_daemon (bool): hand the job to a running conversion daemon if there is one
+
+    Returns:
+    - list: notebooks that were converted
+    """
+    if use_daemon:
+        converted = convert_with_daemon(notebook_files, force)
+        if converted is not None:
+            return converted
+
+    maxCores = os.cpu_count()  # get the number of cores available on the system
+
+    manifest = load_manifest()
+    if notebook_files is None:
+        notebook_files = list_notebooks()
+        # Orphans can only be identified from a full listing
+        remove_orphaned_outputs(set(notebook_files), manifest)
+    pending = dict(find_stale_notebooks(notebook_files, manifest, force))
+    if not pending:
+        save_manifest(manifest)
+        return []
+    render_mermaid_diagrams(pending)
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=maxCores, initializer=init_worker,
+        initargs=(exporter_config, mermaid_render_options, mermaid_inline_svg),
+    ) as executor:
+        converted = run_conversions(executor, pending, manifest)
+
+    save_manifest(manifest)
+    return converted
+
+
+# CONVERSION DAEMON =========
+class ConversionHandler(socketserver.StreamRequestHandler):
+    """Handle one JSON-line conversion request from convert_with_daemon"""
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        server = self.server
+
+        if request.get("code") != server.code or library_versions() != server.libraries:
+            # convert_notebooks.py or nbconvert changed since the daemon started
+            self.reply({"status": "stale"})
+            server.stopping = True
+            return
+        if request.get("options") != server.options:
+            # Another run's flags, the client converts locally and the daemon stays up
+            self.reply({"status": "mismatch"})
+            return
+        if request.get("cwd") != os.getcwd():
+            self.reply({"status": "wrong-directory"})
+            return
+
+        converted = server.convert(request.get("notebooks"), request.get("force", False))
+        self.reply({"status": "ok", "converted": converted})
+
+    def reply(self, response):
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class ConversionDaemon(socketserver.UnixStreamServer):
+    """
+    Long-lived conversion server listening on a local Unix socket.
+
+    Keeps nbconvert imported, a MarkdownExporter built, and a process pool
+    running so a conversion requested on save skips all start-up costs.
+    Requests are handled one at a time, so manifest updates never race.
+    """
+
+    def __init__(self, socket_path=daemon_socket_path):
+        ensure_directory_exists(socket_path)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, ConversionHandler)
+        self.socket_path = socket_path
+        self.code = code_hash()
+        self.libraries = library_versions()
+        self.options = conversion_options()
+        self.exporter = init_exporter()
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=os.cpu_count(), initializer=init_worker,
+            initargs=(exporter_config, mermaid_render_options, mermaid_inline_svg),
+        )
+        self.stopping = False
+
+    def convert(self, notebook_files, force):
+        manifest = load_manifest()
+        if notebook_files is None:
+            notebook_files = list_notebooks()
+            remove_orphaned_outputs(set(notebook_files), manifest)
+        pending = dict(find_stale_notebooks(notebook_files, manifest, force))
+        render_mermaid_diagrams(pending)
+
+        if len(pending) == 1:
+            # A single save converts fastest in-process on the warm exporter
+            notebook_file, entry = next(iter(pending.items()))
+            converted = []
+            if process_notebook(notebook_file, self.exporter):
+                manifest["notebooks"][notebook_file] = entry
+                converted.append(notebook_file)
+        elif pending:
+            converted = run_conversions(self.executor, pending, manifest)
+        else:
+            converted = []
+
+        save_manifest(manifest)
+        for notebook_file in converted:
+            print(f"Converted: {notebook_file}", flush=True)
+        return converted
+
+    def serve(self):
+        print(f"Notebook conversion daemon listening on {self.socket_path}", flush=True)
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.executor.shutdown()
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def convert_with_daemon(notebook_files=None, force=False, socket_path=daemon_socket_path):
+    """
+    Send a conversion job to a running daemon.
+
+    Returns:
+    - list: notebooks converted by the daemon, or None if no usable daemon is running
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+
+    request = {
+        "notebooks": notebook_files,
+        "force": force,
+        "code": code_hash(),
+        "options": conversion_options(),
+        "cwd": os.getcwd(),
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall((json.dumps(request) + "\n").encode())
+            with client.makefile("r", encoding="utf-8") as stream:
+                response = json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+    if response.get("status") != "ok":
+        print(f"Conversion daemon unavailable ({response.get('status')}), converting locally")
+        return None
+    return response["converted"]
+
+
+def stop_daemon(socket_path=daemon_socket_path):
+    """Ask a running daemon to exit by sending it a request it must refuse"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(b'{"code": null}\n')
+            client.recv(1024)
+    except OSError:
+        print("No conversion daemon running")
 
 
 # MERMAID STUFF =========
@@ -143,35 +592,415 @@ def ensure_directory_exists(path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
 
-def convert_mermaid_to_image(mermaid_code):
-    ensure_directory_exists(mermaid_output_directory)
-    mermaid_hash = sha256(mermaid_code.encode()).hexdigest()
-    image_path = os.path.join(mermaid_output_directory, f"{mermaid_hash}.png")
+def extract_mermaid_code(source):
+    """Return the diagram source of a ~~~mermaid markdown cell, else None"""
+    if not source.startswith("~~~mermaid"):
+        return None
+    return source.replace("~~~mermaid", "").replace("~~~", "").strip()
+
+
+def mermaid_options(fmt=None):
+    """Current render options, optionally for a different output format"""
+    options = dict(mermaid_render_options)
+    if fmt:
+        options["format"] = fmt
+    return options
+
+
+def mermaid_cache_key(mermaid_code, fmt=None):
+    digest = sha256(mermaid_code.encode())
+    digest.update(json.dumps(mermaid_options(fmt), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def mermaid_image_path(mermaid_code, fmt=None):
+    extension = mermaid_options(fmt)["format"]
+    return os.path.join(mermaid_output_directory, f"{mermaid_cache_key(mermaid_code, fmt)}.{extension}")
+
+
+def existing_mermaid_image(mermaid_code):
+    """Cached image for a diagram, preferring the configured format over the PNG fallback"""
+    for fmt in (None, "png"):
+        image_path = mermaid_image_path(mermaid_code, fmt)
+        if os.path.exists(image_path):
+            return image_path
+    return None
+
+
+def mmdc_options(fmt=None):
+    options = mermaid_options(fmt)
+    return [
+        "-e", options["format"],
+        "-s", str(options["scale"]),
+        "-t", options["theme"],
+        "-b", options["background"],
+    ]
+
+
+def convert_mermaid_to_image(mermaid_code, fmt=None):
+    os.makedirs(mermaid_output_directory, exist_ok=True)
+    image_path = mermaid_image_path(mermaid_code, fmt)
 
     if not os.path.exists(image_path):
         try:
             process = subprocess.run(
-                ["mmdc", "-i", "-", "-o", image_path, "-s", "10"],
+                ["mmdc", "-i", "-", "-o", image_path] + mmdc_options(fmt),
                 input=mermaid_code,
                 text=True,
                 check=True,
             )
-        except subprocess.CalledProcessError as e:
+        except (OSError, subprocess.CalledProcessError) as e:
             print(f"Error converting mermaid diagram: {e}")
             return None
     return image_path
 
 
+def collect_mermaid_diagrams(notebook_files):
+    """
+    Find the diagrams used by the given notebooks.
+
+    Returns:
+    - dict: image path -> mermaid code, deduplicated by cache key
+    """
+    diagrams = {}
+    for notebook_file in notebook_files:
+        try:
+            with open(notebook_file, "r", encoding="utf-8") as file:
+                cells = json.load(file).get("cells", [])
+        except (OSError, ValueError):
+            continue  # conversion will report the broken notebook
+        for cell in cells:
+            if cell.get("cell_type") != "markdown":
+                continue
+            source = cell.get("source", "")
+            if isinstance(source, list):
+                source = "".join(source)
+            mermaid_code = extract_mermaid_code(source)
+            if mermaid_code:
+                diagrams[mermaid_image_path(mermaid_code)] = mermaid_code
+    return diagrams
+
+
+def render_mermaid_batch(diagrams, fmt=None):
+    """
+    Render several diagrams with one mmdc run, i.e. one headless browser.
+
+    mmdc renders every mermaid block of a markdown input to
+    <output>-<n>.<format> in block order; those are moved to their target paths.
+
+    Returns:
+    - list: (image_path, mermaid_code) pairs that did not render
+    """
+    extension = mermaid_options(fmt)["format"]
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "diagrams.md")
+        output_path = os.path.join(work_dir, "rendered.md")
+        with open(input_path, "w", encoding="utf-8") as file:
+            for _, mermaid_code in diagrams:
+                file.write(f"```mermaid\n{mermaid_code}\n```\n\n")
+        try:
+            subprocess.run(
+                ["mmdc", "-i", input_path, "-o", output_path] + mmdc_options(fmt),
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Batched mermaid render failed, retrying diagrams one at a time: {e}")
+            return list(diagrams)
+
+        failed = []
+        for index, (image_path, mermaid_code) in enumerate(diagrams, start=1):
+            rendered = os.path.join(work_dir, f"rendered-{index}.{extension}")
+            if os.path.exists(rendered):
+                shutil.move(rendered, image_path)
+            else:
+                failed.append((image_path, mermaid_code))
+        return failed
+
+
+def render_in_batches(diagrams, fmt=None):
+    """
+    Render (image_path, mermaid_code) pairs in batches of mermaid_batch_size,
+    each batch a single mmdc process, at most mermaid_concurrency at a time.
+
+    Returns:
+    - list: pairs that did not render
+    """
+    batches = [
+        diagrams[i : i + mermaid_batch_size]
+        for i in range(0, len(diagrams), mermaid_batch_size)
+    ]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=mermaid_concurrency) as executor:
+        results = executor.map(lambda batch: render_mermaid_batch(batch, fmt), batches)
+        return [diagram for failed in results for diagram in failed]
+
+
+def render_mermaid_diagrams(notebook_files):
+    """
+    Render every uncached diagram of a conversion run before notebooks convert.
+
+    Workers then only look up cached images and never launch mmdc themselves.
+    """
+    used = collect_mermaid_diagrams(notebook_files)
+    if not used:
+        return
+    os.makedirs(mermaid_output_directory, exist_ok=True)
+
+    diagrams = [(path, code) for path, code in used.items() if not existing_mermaid_image(code)]
+    if diagrams:
+        print(f"Rendering {len(diagrams)} mermaid diagram(s)")
+        failed = render_in_batches(diagrams)
+
+        # Isolate diagrams that broke a batch so one syntax error can't block
+        # the rest, and fall back to PNG for any the configured format can't do
+        for _, mermaid_code in failed:
+            if not convert_mermaid_to_image(mermaid_code) and mermaid_options()["format"] != "png":
+                convert_mermaid_to_image(mermaid_code, "png")
+
+    index = load_mermaid_index()
+    for mermaid_code in used.values():
+        record_mermaid_use(index, mermaid_code)
+    save_mermaid_index(index)
+
+
+def load_mermaid_index():
+    try:
+        with open(mermaid_index_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_mermaid_index(index):
+    ensure_directory_exists(mermaid_index_path)
+    temp_path = mermaid_index_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=1, sort_keys=True)
+    os.replace(temp_path, mermaid_index_path)
+
+
+def record_mermaid_use(index, mermaid_code):
+    """Index a rendered diagram by cache key with its options, size and last use"""
+    image_path = existing_mermaid_image(mermaid_code)
+    if not image_path:
+        return
+    fmt = os.path.splitext(image_path)[1][1:]
+    index[mermaid_cache_key(mermaid_code, fmt)] = {
+        "file": image_path,
+        "options": mermaid_options(fmt),
+        "size": os.path.getsize(image_path),
+        "last_used": time.time(),
+    }
+
+
+def gc_mermaid_images():
+    """
+    Delete diagram images no notebook references under the current options.
+
+    Meant to run after a full conversion: anything left in the assets
+    directory that the notebooks don't use is from a deleted diagram or
+    from older render settings.
+    """
+    referenced = {
+        existing_mermaid_image(code)
+        for code in collect_mermaid_diagrams(list_notebooks()).values()
+    }
+    index = load_mermaid_index()
+
+    removed = 0
+    freed = 0
+    if os.path.isdir(mermaid_output_directory):
+        for name in os.listdir(mermaid_output_directory):
+            image_path = os.path.join(mermaid_output_directory, name)
+            if image_path not in referenced and os.path.isfile(image_path):
+                freed += os.path.getsize(image_path)
+                os.remove(image_path)
+                removed += 1
+
+    for key, entry in list(index.items()):
+        if entry["file"] not in referenced:
+            del index[key]
+    save_mermaid_index(index)
+
+    print(f"Removed {removed} unreferenced mermaid image(s), freed {freed:,} bytes")
+
+
+def mermaid_size_report():
+    """Render every diagram as SVG and as PNG into a scratch directory and compare bytes"""
+    codes = list(dict.fromkeys(collect_mermaid_diagrams(list_notebooks()).values()))
+    if not codes:
+        print("No mermaid diagrams found")
+        return
+
+    sizes = {}
+    with tempfile.TemporaryDirectory() as report_dir:
+        for fmt in ("svg", "png"):
+            diagrams = [
+                (os.path.join(report_dir, f"{i}.{fmt}"), code) for i, code in enumerate(codes)
+            ]
+            render_in_batches(diagrams, fmt)
+            sizes[fmt] = [
+                os.path.getsize(path) if os.path.exists(path) else None
+                for path, _ in diagrams
+            ]
+
+    print(f"{'Diagram':<10}{'SVG bytes':>14}{'PNG bytes':>14}")
+    for i, code in enumerate(codes):
+        svg_size, png_size = sizes["svg"][i], sizes["png"][i]
+        print(f"{sha256(code.encode()).hexdigest()[:8]:<10}"
+              f"{svg_size if svg_size is not None else 'failed':>14}"
+              f"{png_size if png_size is not None else 'failed':>14}")
+    svg_total = sum(size for size in sizes["svg"] if size)
+    png_total = sum(size for size in sizes["png"] if size)
+    print(f"{'Total':<10}{svg_total:>14,}{png_total:>14,}")
+    if svg_total and png_total:
+        print(f"SVG is {svg_total / png_total:.1%} of PNG size; inline SVG adds the same bytes to the page")
+
+
+def inline_svg(image_path):
+    """Read an SVG for embedding, with a per-diagram id so page styles don't collide"""
+    with open(image_path, "r", encoding="utf-8") as file:
+        svg = file.read()
+    svg = re.sub(r"<\?xml[^>]*\?>", "", svg).replace("\n", " ").strip()
+    diagram_id = "mermaid-" + os.path.splitext(os.path.basename(image_path))[0][:12]
+    # mmdc scopes the diagram's CSS to the id it gives the <svg> element
+    return svg.replace("my-svg", diagram_id)
+
+
 def process_mermaid_cells(notebook):
     for cell in notebook.cells:
-        if cell.cell_type == "markdown" and cell.source.startswith("~~~mermaid"):
-            mermaid_code = (
-                cell.source.replace("~~~mermaid", "").replace("~~~", "").strip()
-            )
-            image_path = convert_mermaid_to_image(mermaid_code)
-            if image_path:
+        if cell.cell_type != "markdown":
+            continue
+        mermaid_code = extract_mermaid_code(cell.source)
+        if mermaid_code:
+            # Rendered up front by render_mermaid_diagrams, never here
+            image_path = existing_mermaid_image(mermaid_code)
+            if not image_path:
+                continue
+            if mermaid_inline_svg and image_path.endswith(".svg"):
+                cell.source = f'<div class="mermaid-diagram">{inline_svg(image_path)}</div>'
+            else:
                 cell.source = f"![Mermaid Diagram](../../../../{image_path})"
 
 
+# BENCHMARK =========
+def make_synthetic_notebook(index, sections=20):
+    """Build an in-memory notebook shaped like a typical lesson"""
+    import nbformat
+
+    notebook = nbformat.v4.new_notebook()
+    notebook.cells.append(nbformat.v4.new_markdown_cell(f"---\ntitle: Synthetic {index}\n---"))
+    for section in range(sections):
+        notebook.cells.append(nbformat.v4.new_markdown_cell(
+            f"## Section {section}\n\nSome *lesson* text with `code` and a [link](https://example.com).\n"
+        ))
+        code = nbformat.v4.new_code_cell(f"for i in range({section}):\n    print(i * {index})")
+        code.outputs.append(nbformat.v4.new_output(
+            "stream", name="stdout", text="".join(f"{i}\n" for i in range(section))
+        ))
+        notebook.cells.append(code)
+    return notebook
+
+
+def benchmark_exporter(count=100):
+    """Compare per-notebook export cost with a new MarkdownExporter each time vs the cached one"""
+    from nbconvert import MarkdownExporter
+    from traitlets.config import Config
+
+    notebooks = [make_synthetic_notebook(i) for i in range(count)]
+
+    start = time.perf_counter()
+    for notebook in notebooks:
+        MarkdownExporter(config=Config(exporter_config)).from_notebook_node(notebook)
+    fresh = (time.perf_counter() - start) / count
+
+    exporter = init_exporter()
+    start = time.perf_counter()
+    for notebook in notebooks:
+        exporter.from_notebook_node(notebook)
+    cached = (time.perf_counter() - start) / count
+
+    print(f"Synthetic notebooks: {count}")
+    print(f"New exporter per notebook: {fresh * 1000:.1f} ms/notebook")
+    print(f"Cached exporter:           {cached * 1000:.1f} ms/notebook")
+    print(f"Speedup: {fresh / cached:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Jupyter notebooks to Jekyll markdown")
+    parser.add_argument("notebooks", nargs="*",
+                        help="Notebooks to convert (default: every notebook in _notebooks)")
+    parser.add_argument("--changed-since", "-s", type=str,
+                        help="Only convert notebooks changed since a git revision or a file's mtime")
+    parser.add_argument("--force", "-f", action="store_true",
+                        help="Convert even if the build manifest says a notebook is unchanged")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run a long-lived conversion daemon on a local Unix socket")
+    parser.add_argument("--stop-daemon", action="store_true",
+                        help="Stop a running conversion daemon")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Convert in this process even if a daemon is running")
+    parser.add_argument("--exporter-config", type=str,
+                        help="YAML/JSON file of traitlets options for MarkdownExporter and its preprocessors")
+    parser.add_argument("--prune", action="store_true",
+                        help="First delete posts whose notebook was removed; with no notebooks listed, only prune")
+    parser.add_argument("--gc", action="store_true",
+                        help="After converting, delete mermaid images no notebook references")
+    parser.add_argument("--mermaid-format", choices=["svg", "png"],
+                        help="Output format for mermaid diagrams (default: svg)")
+    parser.add_argument("--mermaid-inline", action="store_true",
+                        help="Embed SVG mermaid diagrams inline in the generated markdown")
+    parser.add_argument("--mermaid-size-report", action="store_true",
+                        help="Compare SVG and PNG bytes for every mermaid diagram and exit")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="Time MarkdownExporter reuse on N synthetic notebooks and exit")
+
+    args = parser.parse_args()
+
+    if args.exporter_config:
+        load_exporter_config(args.exporter_config)
+    if args.mermaid_format:
+        mermaid_render_options["format"] = args.mermaid_format
+    if args.mermaid_inline:
+        global mermaid_inline_svg
+        mermaid_inline_svg = True
+    if args.mermaid_size_report:
+        mermaid_size_report()
+        return
+    if args.benchmark:
+        benchmark_exporter(args.benchmark)
+        return
+
+    if args.daemon:
+        ConversionDaemon().serve()
+        return
+    if args.stop_daemon:
+        stop_daemon()
+        return
+
+    if args.prune:
+        prune_orphaned_outputs()
+        if not args.notebooks and not args.changed_since and not args.gc:
+            return
+
+    notebook_files = None
+    if args.notebooks:
+        notebook_files = normalize_notebook_paths(args.notebooks)
+    if args.changed_since:
+        changed = notebooks_changed_since(args.changed_since)
+        if notebook_files is None:
+            notebook_files = changed
+        else:
+            notebook_files = sorted(set(notebook_files) & set(changed))
+
+    if notebook_files is not None and not notebook_files and not args.gc:
+        return
+    if notebook_files is None or notebook_files:
+        convert_notebooks(notebook_files, force=args.force, use_daemon=not args.no_daemon)
+    if args.gc:
+        gc_mermaid_images()
+
+
 if __name__ == "__main__":
-    convert_notebooks()
+    main()
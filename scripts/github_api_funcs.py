@@ -1,11 +1,446 @@
 from datetime import datetime
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import re
+import sys
+import time
+import argparse
+import threading
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from dotenv import load_dotenv
 
 load_dotenv()  # Load environment variables from .env file
 
+GITHUB_API_URL = 'https://api.github.com'
+
+# Concurrent requests for fetch_commit_stats, and connections pooled per client
+COMMIT_STATS_WORKERS = 8
+
+# Persistent response cache, see ResponseCache
+RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'github_responses.sqlite')
+CACHE_MODES = ('default', 'offline', 'record', 'off')
+
+# Seconds a cached response stays fresh, by API path pattern (first match wins)
+CACHE_TTLS = [
+    (re.compile(r'/repos/[^/]+/[^/]+/commits/[0-9a-f]{40}(?:\?|$)'), 7 * 24 * 3600),  # a commit by sha never changes
+    (re.compile(r'/search/'), 10 * 60),
+    (re.compile(r'/graphql'), 15 * 60),
+    (re.compile(r'/users/'), 24 * 3600),
+    (re.compile(r'/orgs/'), 60 * 60),
+    (re.compile(r'/user(?:\?|$)'), 60),  # token check
+]
+CACHE_DEFAULT_TTL = 5 * 60
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Link')
+
+class RateLimiter:
+    """
+    Thread-safe scheduler that keeps callers inside GitHub's rate limits.
+    
+    GitHub reports a separate budget per resource (core, search, graphql)
+    in every response's X-RateLimit-* headers; GraphQL queries that select
+    rateLimit { cost remaining resetAt } also report their cost. Before a
+    request, callers wait until the reset time once the remaining budget
+    for that resource falls to the reserve, and responses that hit the
+    limit anyway are retried after Retry-After or the reset.
+    
+    Parameters:
+    - reserve (int): Requests left untouched in each budget.
+    """
+    
+    def __init__(self, reserve=5):
+        self.reserve = reserve
+        self.budgets = {}  # resource -> {'limit', 'remaining', 'reset'}
+        self.stats = {}  # resource -> {'requests', 'not_modified', 'cost', 'waited'}
+        self.pauses = {}  # resource -> reset time already being waited for
+        self.lock = threading.Lock()
+    
+    def _stats(self, resource):
+        return self.stats.setdefault(resource, {'requests': 0, 'not_modified': 0, 'cost': 0, 'waited': 0.0})
+    
+    def wait(self, resource='core'):
+        while True:
+            with self.lock:
+                budget = self.budgets.get(resource)
+                if not budget or budget['remaining'] > self.reserve:
+                    if budget:
+                        # Count this request now, so concurrent callers see it before its response does
+                        budget['remaining'] -= 1
+                    return
+                delay = budget['reset'] - time.time() + 1
+                if delay <= 0:
+                    # Reset has passed, the next response reports the fresh budget
+                    del self.budgets[resource]
+                    return
+                first = self.pauses.get(resource) != budget['reset']
+                if first:
+                    self.pauses[resource] = budget['reset']
+                    self._stats(resource)['waited'] += delay
+            if first:
+                print(f"Rate limit for '{resource}' nearly used, waiting {delay:.0f}s for reset...")
+            # Every caller sleeps until the reset, then re-checks the budget
+            time.sleep(delay)
+    
+    def update(self, response, resource='core'):
+        """Record a response's budget; returns seconds to wait before retrying it, or 0."""
+        headers = response.headers
+        resource = headers.get('X-RateLimit-Resource', resource)
+        with self.lock:
+            stats = self._stats(resource)
+            stats['requests'] += 1
+            if response.status_code == 304:
+                stats['not_modified'] += 1
+            if 'X-RateLimit-Remaining' in headers:
+                self.budgets[resource] = {
+                    'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                    'remaining': int(headers['X-RateLimit-Remaining']),
+                    'reset': int(headers.get('X-RateLimit-Reset', 0)),
+                }
+        if response.status_code in (403, 429):
+            if 'Retry-After' in headers:
+                return int(headers['Retry-After'])
+            if headers.get('X-RateLimit-Remaining') == '0':
+                return max(int(headers.get('X-RateLimit-Reset', 0)) - time.time() + 1, 1)
+        return 0
+    
+    def record_graphql_cost(self, response):
+        """Count the cost of a GraphQL query that selected rateLimit { cost remaining resetAt }."""
+        try:
+            rate_limit = (response.json().get('data') or {}).get('rateLimit')
+        except ValueError:
+            return
+        if rate_limit:
+            with self.lock:
+                self._stats('graphql')['cost'] += rate_limit.get('cost', 0)
+    
+    def report(self):
+        """Budget used this run, one line per resource."""
+        lines = ["GitHub API budget:"]
+        for resource in sorted(set(self.stats) | set(self.budgets)):
+            stats = self._stats(resource)
+            budget = self.budgets.get(resource)
+            line = f"  {resource:<8} {stats['requests']} requests"
+            if stats['not_modified']:
+                line += f", {stats['not_modified']} not modified (free)"
+            if stats['cost']:
+                line += f", query cost {stats['cost']}"
+            if budget:
+                reset = datetime.fromtimestamp(budget['reset']).strftime('%H:%M:%S')
+                line += f", {budget['remaining']}/{budget['limit']} left until {reset}"
+            if stats['waited']:
+                line += f", waited {stats['waited']:.0f}s"
+            lines.append(line)
+        return "\n".join(lines)
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of GitHub API responses.
+    
+    Entries are keyed by a hash of method, URL with query string, JSON body
+    (the GraphQL query and variables) and the Authorization header, so one
+    token is never served responses fetched with another. A fresh entry, one younger than
+    the TTL for its endpoint, is served without touching the network. A stale
+    entry with an ETag is revalidated with If-None-Match, and the 304 costs
+    no quota.
+    
+    Modes:
+    - 'default': serve fresh entries, fetch and store the rest.
+    - 'offline': serve strictly from cache at any age, a miss returns 504.
+    - 'record': always fetch, and store every response for later offline replay.
+    - 'off': no caching at all.
+    
+    Parameters:
+    - path (str): SQLite database file, ':memory:' for a throwaway cache.
+    - mode (str): One of CACHE_MODES.
+    - ttls (list): (compiled path pattern, seconds) pairs, the first match wins.
+    """
+    
+    def __init__(self, path=RESPONSE_CACHE_PATH, mode='default', ttls=CACHE_TTLS):
+        self.path = path
+        self.mode = mode
+        self.ttls = ttls
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0}
+        self.lock = threading.Lock()
+        self.db = None
+        if mode != 'off':
+            if path != ':memory:':
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    method TEXT,
+                    url TEXT,
+                    status INTEGER,
+                    headers TEXT,
+                    body BLOB,
+                    etag TEXT,
+                    fetched_at REAL
+                )""")
+            self.db.commit()
+    
+    @staticmethod
+    def key(method, url, body=None, authorization=None):
+        payload = json.dumps(body, sort_keys=True) if body is not None else ''
+        # Only the hash of the key is stored, never the credentials themselves
+        return hashlib.sha256(f"{method}\n{url}\n{payload}\n{authorization or ''}".encode('utf-8')).hexdigest()
+    
+    def ttl(self, path):
+        for pattern, seconds in self.ttls:
+            if pattern.match(path):
+                return seconds
+        return CACHE_DEFAULT_TTL
+    
+    def get(self, key):
+        if self.db is None:
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, body, etag, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, fetched_at = row
+        return {'status': status, 'headers': json.loads(headers), 'body': body, 'etag': etag, 'fetched_at': fetched_at}
+    
+    def put(self, key, method, url, response):
+        if self.db is None:
+            return
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method, url, response.status_code, json.dumps(headers), response.content,
+                 response.headers.get('ETag'), time.time()))
+            self.db.commit()
+            self.stats['stored'] += 1
+    
+    def touch(self, key):
+        """Mark an entry fresh again after a 304."""
+        with self.lock:
+            self.db.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self.stats['revalidated'] += 1
+    
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+    
+    @staticmethod
+    def response(entry, url):
+        """Build a requests.Response from a cache entry."""
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers.update(entry['headers'])
+        response._content = entry['body']
+        response.url = url
+        response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
+    
+    @staticmethod
+    def miss(url):
+        """504 for an offline request with nothing cached, as HTTP's only-if-cached does."""
+        response = requests.Response()
+        response.status_code = 504
+        response._content = json.dumps({'message': f'Not in the response cache (offline): {url}'}).encode('utf-8')
+        response.headers['Content-Type'] = 'application/json'
+        response.url = url
+        response.encoding = 'utf-8'
+        response.from_cache = True
+        return response
+    
+    def report(self):
+        if self.db is None:
+            return "Response cache: off"
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        stats = self.stats
+        return (f"Response cache ({self.mode}): {stats['hits']} hits, {stats['revalidated']} revalidated, "
+                f"{stats['misses']} misses, {stats['stored']} stored, {entries} entries")
+    
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+class GitHubClient:
+    """
+    Shared HTTP client for the GitHub REST and GraphQL APIs.
+    
+    Owns one requests.Session, so consecutive calls (pages of a listing,
+    one call per repo or per commit) reuse pooled keep-alive connections
+    instead of opening a new TLS connection each time. Auth, gzip and
+    timeouts are set here once rather than in every function. Every request
+    goes through a RateLimiter and a ResponseCache.
+    
+    Parameters:
+    - token (str): GitHub API token, sent as a Bearer token (optional).
+    - pool_size (int): Connections kept open per host, raise it for threaded callers.
+    - timeout (float or tuple): requests timeout in seconds, or (connect, read).
+    - base_url (str): API root; relative paths like '/user' are resolved against it.
+    - cache (ResponseCache): Response cache to use, None to cache nothing.
+    """
+    
+    def __init__(self, token=None, pool_size=10, timeout=(10, 60), base_url=GITHUB_API_URL, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.graphql_url = f'{self.base_url}/graphql'
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter()
+        self.cache = cache or ResponseCache(mode='off')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'pages-github-api-funcs',
+        })
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+    
+    def url(self, path):
+        """Absolute URL for a path, full URLs (pagination links) pass through."""
+        return path if path.startswith(('http://', 'https://')) else f'{self.base_url}{path}'
+    
+    def resource(self, url):
+        """Rate limit bucket a request is charged to."""
+        if url == self.graphql_url:
+            return 'graphql'
+        if url.startswith(f'{self.base_url}/search/'):
+            return 'search'
+        return 'core'
+    
+    @staticmethod
+    def graphql_errors(response):
+        """Whether a GraphQL response reports errors, which GitHub sends with a 200."""
+        try:
+            return bool(response.json().get('errors'))
+        except (ValueError, AttributeError):
+            return True
+    
+    def request(self, method, path, retries=3, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        url = requests.Request(method, self.url(path), params=kwargs.pop('params', None)).prepare().url
+        api_path = url[len(self.base_url):] if url.startswith(self.base_url) else url
+        resource = self.resource(url)
+        
+        # GETs and GraphQL queries are cacheable, other POSTs always go out
+        cacheable = self.cache.mode != 'off' and (method == 'GET' or resource == 'graphql')
+        key = cached = None
+        if cacheable:
+            key = ResponseCache.key(method, url, kwargs.get('json'), self.session.headers.get('Authorization'))
+            cached = self.cache.get(key)
+            if self.cache.mode == 'offline':
+                self.cache.count('hits' if cached else 'misses')
+                return ResponseCache.response(cached, url) if cached else ResponseCache.miss(url)
+            if cached and self.cache.mode == 'default':
+                if time.time() - cached['fetched_at'] < self.cache.ttl(api_path):
+                    self.cache.count('hits')
+                    return ResponseCache.response(cached, url)
+                if cached['etag']:
+                    kwargs['headers'] = {**kwargs.get('headers', {}), 'If-None-Match': cached['etag']}
+        
+        for attempt in range(retries):
+            self.rate_limiter.wait(resource)
+            response = self.session.request(method, url, **kwargs)
+            delay = self.rate_limiter.update(response, resource)
+            if not delay or attempt == retries - 1:
+                break
+            print(f"Rate limited on '{resource}', retrying in {delay:.0f}s...")
+            time.sleep(delay)
+        
+        if response.status_code == 304 and cached:
+            # Unchanged since it was cached: serve the stored body as a normal 200
+            self.cache.touch(key)
+            return ResponseCache.response(cached, url)
+        if resource == 'graphql' and response.status_code == 200:
+            self.rate_limiter.record_graphql_cost(response)
+        if cacheable:
+            self.cache.count('misses')
+            # Failed queries (bad node id, missing scope) must not be replayed for a week
+            if response.status_code == 200 and not (resource == 'graphql' and self.graphql_errors(response)):
+                self.cache.put(key, method, url, response)
+        return response
+    
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+    
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+    
+    def graphql(self, query, variables=None):
+        """POST a GraphQL query, returns the response like post()."""
+        payload = {'query': query}
+        if variables is not None:
+            payload['variables'] = variables
+        return self.post(self.graphql_url, json=payload)
+    
+    def budget_report(self):
+        return f"{self.rate_limiter.report()}\n{self.cache.report()}"
+    
+    def close(self):
+        self.cache.close()
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+# One client per token, shared by every function below
+_clients = {}
+_cache = None
+
+def set_cache_mode(mode):
+    """
+    Choose how the shared clients use the response cache, before the first call.
+    
+    Parameters:
+    - mode (str): One of CACHE_MODES, see ResponseCache.
+    """
+    global _cache
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode {mode!r}, expected one of {', '.join(CACHE_MODES)}")
+    if _cache is not None:
+        _cache.close()
+    _cache = ResponseCache(mode=mode)
+    for client in _clients.values():
+        client.cache = _cache
+
+def add_cache_arguments(parser):
+    """Add --offline, --record and --no-cache to a script's argument parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--offline', dest='cache_mode', action='store_const', const='offline',
+                       help='Serve GitHub API responses strictly from the local cache, without network')
+    group.add_argument('--record', dest='cache_mode', action='store_const', const='record',
+                       help='Fetch every GitHub API response live and record it for --offline replay')
+    group.add_argument('--no-cache', dest='cache_mode', action='store_const', const='off',
+                       help='Bypass the GitHub API response cache')
+    parser.set_defaults(cache_mode=os.environ.get('GITHUB_CACHE_MODE', 'default'))
+
+def get_client(token):
+    """Return the shared GitHubClient for a token, creating it on first use."""
+    if _cache is None:
+        set_cache_mode(os.environ.get('GITHUB_CACHE_MODE', 'default'))
+    if token not in _clients:
+        _clients[token] = GitHubClient(token, pool_size=COMMIT_STATS_WORKERS, cache=_cache)
+    return _clients[token]
+
+def budget_report():
+    """Rate limit budget used by every shared client this run, and response cache use."""
+    reports = [client.rate_limiter.report() for client in _clients.values()]
+    if _cache is not None:
+        reports.append(_cache.report())
+    return "\n".join(reports)
+
 def get_token_dotenv():
     """Retrieve the GitHub token from environment variables."""
     return os.getenv('GITHUB_TOKEN')
@@ -53,7 +488,7 @@ def get_target_info():
 
 def test_token(token):
     """Test the GitHub token by fetching the current user's profile."""
-    response = requests.get('https://api.github.com/user', headers={'Authorization': f'token {token}'})
+    response = get_client(token).get('/user')
     if response.status_code == 200:
         print("Token is valid.")
         return True
@@ -63,12 +498,11 @@ def test_token(token):
     
 def list_org_repos(token, org_name):
     """List all repositories for a given organization."""
-    url = f'https://api.github.com/orgs/{org_name}/repos'
+    url = f'/orgs/{org_name}/repos'
     headers = {
-        'Authorization': f'token {token}',
         'Accept': 'application/vnd.github.v3+json'
     }
-    response = requests.get(url, headers=headers)
+    response = get_client(token).get(url, headers=headers)
     if response.status_code == 200:
         return response.json()  # List of repositories
     else:
@@ -78,14 +512,14 @@ def list_org_repos(token, org_name):
 def fetch_profile(token, target_type, target_name):
     """Fetch profile information of a specified organization or user."""
     if target_type == 'organization':
-        url = f'https://api.github.com/orgs/{target_name}'
+        url = f'/orgs/{target_name}'
     elif target_type == 'user':
-        url = f'https://api.github.com/users/{target_name}'
+        url = f'/users/{target_name}'
     else:
         print("Invalid target type. Use 'organization' or 'user'.")
         return None
 
-    response = requests.get(url, headers={'Authorization': f'token {token}'})
+    response = get_client(token).get(url)
     if response.status_code == 200:
         return response.json()
     else:
@@ -135,20 +569,8 @@ def fetch_user_commits(token, username):
     }
     """
     
-    # Headers for authorization
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    
-    # Request payload
-    payload = {
-        "query": query,
-        "variables": {"username": username},
-    }
-    
-    # Make the request
-    response = requests.post('https://api.github.com/graphql', json=payload, headers=headers)
+    # Make the request, the client adds the authorization header
+    response = get_client(token).graphql(query, {"username": username})
     
     # Check for errors
     if response.status_code == 200:
@@ -156,28 +578,88 @@ def fetch_user_commits(token, username):
     else:
         raise Exception(f"Query failed to run by returning code of {response.status_code}. {response.text}")
 
-def fetch_user_organization_commits(token, username, organization):
-    headers = {"Authorization": f"Bearer {token}"}
+def fetch_user_organization_commits(token, username, organization, per_page=30):
     query = f"org:{organization} author:{username}"
-    url = f"https://api.github.com/search/commits?q={query}"
     
-    response = requests.get(url, headers=headers)
+    response = get_client(token).get('/search/commits', params={'q': query, 'per_page': per_page})
     if response.status_code == 200:
         return response.json()
     else:
         return None
         
+def fetch_commit_stats(token, usernames, organization, max_workers=COMMIT_STATS_WORKERS, per_page=100):
+    """
+    Fetch additions/deletions for the organization commits of many users at once.
+    
+    Commit searches and per-commit detail requests run on a bounded thread
+    pool sharing the client's connection pool, and the client's RateLimiter
+    keeps the search and core budgets from running out mid-run. Results are yielded as
+    each detail request finishes, so callers can print or store them while
+    the rest are still in flight; order is not preserved.
+    
+    Parameters:
+    - token (str): GitHub API token for authorization.
+    - usernames (list): GitHub usernames to report on.
+    - organization (str): Organization whose commits are searched.
+    - max_workers (int): Requests in flight at once.
+    - per_page (int): Commits per user from the search API (max 100).
+    
+    Returns:
+    - generator: dicts with username, total_count, repo, sha, url, message, date,
+      additions and deletions for each commit.
+    """
+    client = get_client(token)
+    
+    def commit_details(username, total_count, commit):
+        response = client.get(commit['url'])
+        if response.status_code != 200:
+            print(f"Failed to fetch commit {commit['sha'][:7]} for {username}, status: {response.status_code}")
+            return None
+        stats = response.json()['stats']
+        return {
+            'username': username,
+            'total_count': total_count,
+            'repo': commit['repository']['name'],
+            'sha': commit['sha'],
+            'url': commit['html_url'],
+            'message': commit['commit']['message'],
+            'date': commit['commit']['committer']['date'],
+            'additions': stats['additions'],
+            'deletions': stats['deletions'],
+        }
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        searches = {executor.submit(fetch_user_organization_commits, token, username, organization,
+                                    per_page): username for username in usernames}
+        pending = set(searches)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in searches:
+                    username = searches[future]
+                    commits = future.result()
+                    if commits is None:
+                        print(f"Failed to search commits for {username}")
+                        continue
+                    # Queue this user's detail requests behind whatever is running
+                    pending.update(executor.submit(commit_details, username, commits['total_count'], commit)
+                                   for commit in commits['items'])
+                else:
+                    result = future.result()
+                    if result:
+                        yield result
+
 def list_org_projects(token, org_name):
     """Fetch all projects for a given organization, handling pagination."""
     projects = []
-    url = f'https://api.github.com/orgs/{org_name}/projects'
+    url = f'/orgs/{org_name}/projects'
     headers = {
-        'Authorization': f'token {token}',
         'Accept': 'application/vnd.github.inertia-preview+json'
     }
     
     while url:
-        response = requests.get(url, headers=headers)
+        # Pages share the client's pooled connection
+        response = get_client(token).get(url, headers=headers)
         if response.status_code == 200:
             projects.extend(response.json())
             # Check if there is a 'next' page
@@ -206,11 +688,7 @@ def list_org_projects_v2(token, org_login):
     """ 
        
     projects = [] # List to store projects
-    graphql_url = 'https://api.github.com/graphql' # GitHub GraphQL API endpoint
-    headers = { #  credentials and content type for the request
-        'Authorization': f'Bearer {token}',
-        'Content-Type': 'application/json',
-    }
+    client = get_client(token) # pooled session with credentials for the GraphQL API
     
     ''' 
     GraphQL query to fetch projectsV2 for an organization, 
@@ -241,6 +719,11 @@ def list_org_projects_v2(token, org_login):
           }
         }
       }
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
     }
     """
     # Variables for the query
@@ -250,7 +733,7 @@ def list_org_projects_v2(token, org_login):
 
     while True:
         # Send a POST request to the GraphQL API with the query and variables defined above
-        response = requests.post(graphql_url, headers=headers, json={'query': query, 'variables': variables})
+        response = client.graphql(query, variables)
         if response.status_code == 200:
             data = response.json()['data']['organization']['projectsV2'] # location of project 
             projects.extend([edge['node'] for edge in data['edges']]) # add projects to the list 
@@ -277,11 +760,7 @@ def list_org_projects_v2_with_issues(token, org_login):
             Each issue includes id, title, url, body, and custom fields.
     """
     projects_with_issues = []
-    graphql_url = 'https://api.github.com/graphql'
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Content-Type': 'application/json',
-    }
+    client = get_client(token)
     # GraphQL query to fetch projectsV2 and their issues, including custom fields for each issue.
     query = """
     query($orgLogin: String!, $cursor: String) {
@@ -333,12 +812,17 @@ def list_org_projects_v2_with_issues(token, org_login):
         }
         }
     }
+    rateLimit {
+        cost
+        remaining
+        resetAt
+    }
     }
     """
     variables = {'orgLogin': org_login, 'cursor': None}
 
     while True:
-        response = requests.post(graphql_url, headers=headers, json={'query': query, 'variables': variables})
+        response = client.graphql(query, variables)
         response_json = response.json()
         
         # Check for successful response
@@ -382,13 +866,188 @@ def list_org_projects_v2_with_issues(token, org_login):
 
     return projects_with_issues
 
+# Project ids by (organization, title), ids never change once a project exists
+_project_ids = {}
+
+def find_project_v2_id(token, org_login, project_title):
+    """
+    Resolve a projectV2 id from its title.
+    
+    GitHub's project search is tried first, so usually only matching projects
+    come back. The search is fuzzy and can miss titles with punctuation or
+    repeated spaces, so when it does, the organization's projects are paged
+    through in full.
+    
+    Parameters:
+    - token (str): GitHub API token for authorization.
+    - org_login (str): The login name of the organization.
+    - project_title (str): The exact title of the project.
+    
+    Returns:
+    - str: The project's node id, or None if no project has that title.
+    """
+    if (org_login, project_title) in _project_ids:
+        return _project_ids[(org_login, project_title)]
+    
+    client = get_client(token)
+    search_query = """
+    query($orgLogin: String!, $title: String!, $cursor: String) {
+      organization(login: $orgLogin) {
+        projectsV2(first: 20, query: $title, after: $cursor) {
+          nodes {
+            id
+            title
+          }
+          pageInfo {
+            endCursor
+            hasNextPage
+          }
+        }
+      }
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
+    }
+    """
+    listing_query = """
+    query($orgLogin: String!, $cursor: String) {
+      organization(login: $orgLogin) {
+        projectsV2(first: 100, after: $cursor) {
+          nodes {
+            id
+            title
+          }
+          pageInfo {
+            endCursor
+            hasNextPage
+          }
+        }
+      }
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
+    }
+    """
+    lookups = [
+        (search_query, {'orgLogin': org_login, 'title': project_title, 'cursor': None}),
+        (listing_query, {'orgLogin': org_login, 'cursor': None}),
+    ]
+    
+    for query, variables in lookups:
+        while True:
+            response = client.graphql(query, variables)
+            response_json = response.json()
+            if response.status_code != 200 or 'errors' in response_json:
+                print(f"Failed to look up projectsV2, status code: {response.status_code}, response: {response_json}")
+                break
+            
+            # Keep only the exact title, the search also matches words anywhere in it
+            data = response_json['data']['organization']['projectsV2']
+            for project in data['nodes']:
+                if project['title'] == project_title:
+                    _project_ids[(org_login, project_title)] = project['id']
+                    return project['id']
+            if not data['pageInfo']['hasNextPage']:
+                break
+            variables['cursor'] = data['pageInfo']['endCursor']
+    return None
+
+def list_project_v2_issues(token, project_id, page_size=100):
+    """
+    Fetch the issues of a single projectV2, following cursor pagination over its items.
+    
+    Parameters:
+    - token (str): GitHub API token for authorization.
+    - project_id (str): The project's node id, see find_project_v2_id.
+    - page_size (int): Items per request, GitHub allows up to 100.
+    
+    Returns:
+    - dict: The project's id, title, url, and issues, in the same shape as an entry of
+            list_org_projects_v2_with_issues, or None if the query fails.
+    """
+    client = get_client(token)
+    # Field values are read from the project item itself, so they always belong to this project
+    query = """
+    query($projectId: ID!, $pageSize: Int!, $cursor: String) {
+      node(id: $projectId) {
+        ... on ProjectV2 {
+          id
+          title
+          url
+          items(first: $pageSize, after: $cursor) {
+            nodes {
+              type
+              fieldValues(first: 10) {
+                nodes {
+                  ... on ProjectV2ItemFieldTextValue {
+                    text
+                  }
+                  ... on ProjectV2ItemFieldNumberValue {
+                    number
+                  }
+                  ... on ProjectV2ItemFieldDateValue {
+                    date
+                  }
+                }
+              }
+              content {
+                ... on Issue {
+                  id
+                  title
+                  url
+                  body
+                }
+              }
+            }
+            pageInfo {
+              endCursor
+              hasNextPage
+            }
+          }
+        }
+      }
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
+    }
+    """
+    variables = {'projectId': project_id, 'pageSize': page_size, 'cursor': None}
+    project = None
+    
+    while True:
+        response = client.graphql(query, variables)
+        response_json = response.json()
+        if response.status_code != 200 or 'errors' in response_json:
+            print(f"Failed to fetch project items, status code: {response.status_code}, response: {response_json}")
+            return None
+        
+        data = response_json['data']['node']
+        if project is None:
+            project = {'id': data['id'], 'title': data['title'], 'url': data['url'], 'issues': []}
+        project['issues'].extend({
+            'id': item['content']['id'],
+            'title': item['content']['title'],
+            'url': item['content']['url'],
+            'body': item['content']['body'],
+            'fields': item['fieldValues']['nodes']
+        } for item in data['items']['nodes'] if item['type'] == 'ISSUE')
+        
+        if not data['items']['pageInfo']['hasNextPage']:
+            return project
+        variables['cursor'] = data['items']['pageInfo']['endCursor']
+
 def get_project_issues_as_dict(token, target_name, selected_project_title):
     """
     Retrieves issues for a specific project within an organization and formats them as a dictionary.
     
-    This function first fetches all projects with their issues for a given organization. It then filters
-    out the specific project by title and formats the issues into a more simplified dictionary structure
-    for easier consumption.
+    This function resolves the project's id by title, fetches only that project's issues, and formats
+    them into a more simplified dictionary structure for easier consumption.
     
     Parameters:
     - token (str): GitHub API token for authorization.
@@ -400,11 +1059,9 @@ def get_project_issues_as_dict(token, target_name, selected_project_title):
             with keys for title, url, start_week, start_date, end_date, and body. If the project or issues are
             not found, returns a dictionary with an error key.
     """
-    # Fetch all projects with their issues for the given organization
-    projects_with_issues = list_org_projects_v2_with_issues(token, target_name)
-    
-    # Filter for the selected project by title
-    selected_project = next((project for project in projects_with_issues if project['title'] == selected_project_title), None)
+    # Look up the selected project by title, then fetch just its issues
+    project_id = find_project_v2_id(token, target_name, selected_project_title)
+    selected_project = list_project_v2_issues(token, project_id) if project_id else None
     project_data = {}
 
     if selected_project:
@@ -441,7 +1098,86 @@ def get_project_issues_as_dict(token, target_name, selected_project_title):
     return project_data
 
 
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """Local stand-in for api.github.com that answers every GET with a small JSON body."""
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    wbufsize = 1 << 16  # send headers and body in one segment, flushed per request
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        body = json.dumps({'login': 'octocat', 'path': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def benchmark_client(count=500):
+    """
+    Measure requests per second against a local stub server, using a new
+    connection per call (module-level requests.get, as before) vs GitHubClient
+    with the cache off, then recording into a ResponseCache (one SQLite commit
+    per response) and replaying the same calls from it.
+    
+    The stub is plain HTTP on localhost, so the gap here is a lower bound:
+    against api.github.com every new connection also pays a TLS handshake.
+    
+    Parameters:
+    - count (int): Requests per variant.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            requests.get(f'{base_url}/repos/{i}', headers={'Authorization': 'token stub'}).json()
+        unpooled = count / (time.perf_counter() - start)
+        
+        with GitHubClient('stub', base_url=base_url) as client:
+            start = time.perf_counter()
+            for i in range(count):
+                client.get(f'/repos/{i}').json()
+            pooled = count / (time.perf_counter() - start)
+        
+        cache = ResponseCache(':memory:', mode='record')
+        with GitHubClient('stub', base_url=base_url, cache=cache) as client:
+            start = time.perf_counter()
+            for i in range(count):
+                client.get(f'/repos/{i}').json()
+            recorded = count / (time.perf_counter() - start)
+            
+            cache.mode = 'offline'
+            start = time.perf_counter()
+            for i in range(count):
+                client.get(f'/repos/{i}').json()
+            replayed = count / (time.perf_counter() - start)
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    print(f"Stub server requests: {count} per variant")
+    print(f"  requests.get per call: {unpooled:8.0f} req/s")
+    print(f"  GitHubClient session:  {pooled:8.0f} req/s ({pooled / unpooled:.1f}x)")
+    print(f"  session, cache record: {recorded:8.0f} req/s ({recorded / unpooled:.1f}x)")
+    print(f"  offline cache replay:  {replayed:8.0f} req/s ({replayed / unpooled:.1f}x)")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='GitHub API diagnostics for the configured target')
+    parser.add_argument('--benchmark', type=int, nargs='?', const=500, metavar='N',
+                        help='Compare per-call connections with the pooled client on a local stub server and exit')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    set_cache_mode(args.cache_mode)
+    if args.benchmark:
+        benchmark_client(args.benchmark)
+        sys.exit(0)
+    
     # Main function to test the GitHub API functions
     
     ''' Development Testing: 
@@ -521,46 +1257,38 @@ if __name__ == "__main__":
         usernames = ["rachit-j","tanishapatil1234","TDWolff","iKAN2025","tuckergol"]
         organization = "open-coding-society"
         
+        # Look at user's repositories and commit
+        """
         for username in usernames:
-            print()
-            # Look at user's repositories and commit
-            """
             user_info = fetch_user_commits(token, username)
             print("Repo Info:", user_info['data']['user']['name'])
             for repo in user_info['data']['user']['repositories']['nodes']:
                 print(repo['defaultBranchRef']['target']['history']['totalCount'], repo['name'], repo['url'], repo['defaultBranchRef']['name'])
-            
             print() 
-            """
+        """
+        
+        # Look at the users' commits for a specific organization; commits from all
+        # users are fetched concurrently and printed as they arrive
+        print("Commits for users/organization", ", ".join(usernames), organization)
+        seen_users = set()
+        for commit in fetch_commit_stats(token, usernames, organization):
+            if commit['username'] not in seen_users:
+                seen_users.add(commit['username'])
+                print(f"Total commits for {commit['username']}: {commit['total_count']}")
+            
+            # Parse and format the commit date as before
+            commit_date_str = commit['date']
+            if commit_date_str[-3] == ':':
+                commit_date_str = commit_date_str[:-3] + commit_date_str[-2:]
+            commit_date = datetime.fromisoformat(commit_date_str)
+            formatted_date = commit_date.strftime("%B %d, %Y, %H:%M")
+            
+            # Repository name and abbreviated commit hash for a concise display
+            abbreviated_url = f"{commit['repo']}@{commit['sha'][:7]}"
             
-            # Look at user's commits for a specific organization
-            print("Commits for user/organization", username, organization) 
-            commits = fetch_user_organization_commits(token, username, organization)
-            # Assuming 'commits' is the result from the fetch_user_organization_commits function
-            if commits:
-                print('Total commits: ', commits['total_count'])
-                for commit in commits['items']:
-                    commit_url = commit['url']
-                    # Make an additional request to fetch detailed commit data
-                    response = requests.get(commit_url, headers={"Authorization": f"Bearer {token}"})
-                    if response.status_code == 200:
-                        commit_data = response.json()
-                        additions = commit_data['stats']['additions']
-                        deletions = commit_data['stats']['deletions']
-                        
-                        # Parse and format the commit date as before
-                        commit_date_str = commit['commit']['committer']['date']
-                        if commit_date_str[-3] == ':':
-                            commit_date_str = commit_date_str[:-3] + commit_date_str[-2:]
-                        commit_date = datetime.fromisoformat(commit_date_str)
-                        formatted_date = commit_date.strftime("%B %d, %Y, %H:%M")
-                        
-                        # Extract repository name and commit hash from the html_url for a concise display
-                        url_parts = commit['html_url'].split('/')
-                        repo_name = url_parts[4]  # Assuming standard GitHub URL format
-                        commit_hash = url_parts[-1]
-                        abbreviated_url = f"{repo_name}@{commit_hash[:7]}"  # Shorten the commit hash for brevity
-
-                        # Print the formatted date, commit message, plus/minus lines, and abbreviated URL
-                        print(f"{formatted_date}: {commit['commit']['message']} (+{additions}/-{deletions}) {abbreviated_url}")
-                print()
\ No newline at end of file
+            # Print the user, formatted date, commit message, plus/minus lines, and abbreviated URL
+            print(f"{commit['username']} {formatted_date}: {commit['message']} "
+                  f"(+{commit['additions']}/-{commit['deletions']}) {abbreviated_url}")
+        print()
+    
+    print(budget_report())
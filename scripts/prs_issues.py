@@ -1,7 +1,8 @@
 import json
 import os
-import requests
+import argparse
 from datetime import datetime
+import github_api_funcs as gha
 
 def generate_markdown_file(issue_data, file_path, type):
     """
@@ -73,21 +74,16 @@ def get_github_repository_issues_and_prs(token, owner, repo):
                 }}
             }}
         }}
+        rateLimit {{
+            cost
+            remaining
+            resetAt
+        }}
     }}
     """
 
-    # Define headers
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
-    # Make the request
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
+    # Make the request on the shared client, which paces it against the GraphQL rate limit
+    response = gha.get_client(token).graphql(query)
 
     # Check for successful response
     if response.status_code == 200:
@@ -137,4 +133,8 @@ def create_issues_and_prs():
         generate_markdown_file(pr_data, f"_posts/{pr_data['created_at']}-{pr['title'].replace(' ', '-').replace('/', ' ')}_GithubPR.md", "pull_request")
 
 if __name__ == "__main__":
-    create_issues_and_prs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Fetch repository issues and pull requests into _posts')
+    gha.add_cache_arguments(parser)
+    gha.set_cache_mode(parser.parse_args().cache_mode)
+    create_issues_and_prs()
+    print(gha.budget_report())
\ No newline at end of file
@@ -1,7 +1,8 @@
 import json
 import os
-import requests
+import argparse
 from datetime import datetime
+import github_api_funcs as gha
 
 def generate_json_file(data, file_path):
     """
@@ -56,21 +57,16 @@ def get_github_repository_issues_and_prs(token, owner, repo):
                 }}
             }}
         }}
+        rateLimit {{
+            cost
+            remaining
+            resetAt
+        }}
     }}
     """
 
-    # Define headers
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
-    # Make the request
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
+    # Make the request on the shared client, which paces it against the GraphQL rate limit
+    response = gha.get_client(token).graphql(query)
 
     # Check for successful response
     if response.status_code == 200:
@@ -124,6 +120,10 @@ def create_issues_and_prs_json(owner="open-coding-society", repo="pages"):
     generate_json_file(author_data, f"_posts/{repo}-by_author.json")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Summarize repository issues and pull requests by author')
+    gha.add_cache_arguments(parser)
+    gha.set_cache_mode(parser.parse_args().cache_mode)
     create_issues_and_prs_json(repo="pages")
     create_issues_and_prs_json(repo="flask_2025")
-    create_issues_and_prs_json(repo="kasm-multi-server")
\ No newline at end of file
+    create_issues_and_prs_json(repo="kasm-multi-server")
+    print(gha.budget_report())
\ No newline at end of file
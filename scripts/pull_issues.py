@@ -1,4 +1,5 @@
 import os
+import argparse
 import requests
 from datetime import datetime
 import math
@@ -78,21 +79,16 @@ def get_github_repository_issues(token=None):
         }
         }
     }
+    rateLimit {
+        cost
+        remaining
+        resetAt
     }
-    """
-
-    # Define headers
-    headers = {
-        "Authorization": f"Bearer {token}" if token else None,
-        "Content-Type": "application/json",
     }
+    """
 
-    # Make the request
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
+    # Make the request on the shared client, which paces it against the GraphQL rate limit
+    response = gha.get_client(token).graphql(query)
 
     # Check for successful response
     if response.status_code == 200:
@@ -108,7 +104,9 @@ def create_issues():
   
   # Call the function to get the issues data, then extract a nested data structure from the response, this corresonds to an array of issues
   # we need to extract the specific project data, perhaps "projectsV2" in the code to yml file, so we can run CSP and CSSE with same python script
-  csa_data = get_github_repository_issues(token)["data"]["organization"]["projectsV2"]["nodes"][0]["items"]["nodes"]
+  # Both projects come back in one response, so query once and index into it
+  projects = get_github_repository_issues(token)["data"]["organization"]["projectsV2"]["nodes"]
+  csa_data = projects[0]["items"]["nodes"]
   # we need to move the data logic into yml file in order to have accurate week calculation
   date1 = datetime(2023, 8, 21)
   for issue in csa_data:
@@ -135,7 +133,7 @@ def create_issues():
         generate_markdown_file(issue_data, f"_posts/{dueDate}-{issue['title'].replace(' ', '-').replace('/', ' ')}_GithubIssue_.md", "csa")
 
   # Recieves the CSP data through searching the second project entry rather than the first
-  csp_data = get_github_repository_issues(token)["data"]["organization"]["projectsV2"]["nodes"][1]["items"]["nodes"]
+  csp_data = projects[1]["items"]["nodes"]
   date1 = datetime(2023, 8, 21)
   for issue in csp_data:
       issue = issue["content"]
@@ -187,4 +185,8 @@ def getToken():
 
     
 if __name__ == "__main__":
-    create_issues()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Fetch project issues into _posts')
+    gha.add_cache_arguments(parser)
+    gha.set_cache_mode(parser.parse_args().cache_mode)
+    create_issues()
+    print(gha.budget_report())
\ No newline at end of file
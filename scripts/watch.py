@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Source Watcher for Notebook and DOCX Conversion
+Watches _notebooks and _docx directly and converts only the files that changed
+Uses watchdog (inotify/FSEvents) when installed, otherwise falls back to polling
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+
+# Run from the repo root so scripts.* imports and relative paths resolve
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scripts.convert_notebooks import convert_notebooks
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+WATCHED_DIRECTORIES = ["_notebooks", "_docx"]
+
+# Reads (opened/closed_no_write) are ignored, or converting a file would re-queue it
+CHANGE_EVENTS = {"created", "modified", "moved", "deleted", "closed"}
+
+
+def classify(path):
+    """Return the converter responsible for a path, or None to ignore it"""
+    parts = Path(path).parts
+    name = Path(path).name
+    if name.startswith((".", "~$")) or "_IPYNB_2_" in name or ".ipynb_checkpoints" in parts:
+        return None
+    if parts and parts[0] == "_notebooks" and name.endswith(".ipynb"):
+        return "notebook"
+    if parts and parts[0] == "_docx":
+        if name.endswith(".docx"):
+            return "docx"
+        if name == "_config.yml":
+            return "docx-config"
+    return None
+
+
+class ChangeQueue:
+    """
+    Debounced, coalescing queue of changed source files.
+
+    Each path is kept once no matter how many events it receives. A batch is
+    released only after no new event arrived for `debounce` seconds, so an
+    editor's burst of writes/renames on save becomes a single conversion.
+    """
+
+    def __init__(self, debounce=0.5):
+        self.debounce = debounce
+        self.pending = {}
+        self.last_event = 0.0
+        self.condition = threading.Condition()
+
+    def add(self, path):
+        kind = classify(path)
+        if kind is None:
+            return
+        with self.condition:
+            self.pending[path] = kind
+            self.last_event = time.monotonic()
+            self.condition.notify()
+
+    def take_batch(self):
+        """Block until a quiet period follows at least one change, then return the batch"""
+        with self.condition:
+            while True:
+                if self.pending:
+                    quiet = time.monotonic() - self.last_event
+                    if quiet >= self.debounce:
+                        batch, self.pending = self.pending, {}
+                        return batch
+                    self.condition.wait(self.debounce - quiet)
+                else:
+                    self.condition.wait()
+
+
+class SourceEventHandler(FileSystemEventHandler):
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.queue.add(os.path.relpath(path))
+
+
+def poll_changes(queue, interval):
+    """Fallback when watchdog is missing: compare mtimes on every interval"""
+    def snapshot():
+        mtimes = {}
+        for directory in WATCHED_DIRECTORIES:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime
+                    except OSError:
+                        pass
+        return mtimes
+
+    previous = snapshot()
+    while True:
+        time.sleep(interval)
+        current = snapshot()
+        for path in current.keys() | previous.keys():
+            if current.get(path) != previous.get(path):
+                queue.add(path)
+        previous = current
+
+
+def dispatch(batch):
+    """Send one coalesced batch to the converters"""
+    notebooks = sorted(p for p, kind in batch.items() if kind == "notebook" and os.path.exists(p))
+    removed_notebooks = [p for p, kind in batch.items() if kind == "notebook" and not os.path.exists(p)]
+    docx_files = sorted(p for p, kind in batch.items() if kind == "docx")
+    configs = sorted(p for p, kind in batch.items() if kind == "docx-config")
+
+    if removed_notebooks:
+        # A full pass is cheap with the manifest and cleans up orphaned posts
+        convert_notebooks()
+    elif notebooks:
+        print(f"Notebooks changed: {', '.join(notebooks)}", flush=True)
+        convert_notebooks(notebooks)
+
+    for config in configs:
+        print(f"🔧 Config file changed: {config}", flush=True)
+        subprocess.run([sys.executable, "scripts/convert_docx.py", "--config-changed", config])
+
+    existing_docx = [p for p in docx_files if os.path.exists(p)]
+    if len(existing_docx) < len(docx_files):
+        # As with notebooks, a full pass removes the posts and images of deleted documents
+        print("DOCX removed, running a full conversion", flush=True)
+        subprocess.run([sys.executable, "scripts/convert_docx.py"])
+    elif existing_docx:
+        print(f"DOCX changed: {', '.join(existing_docx)}", flush=True)
+        subprocess.run([sys.executable, "scripts/convert_docx.py", *existing_docx])
+
+
+def watch(debounce=0.5, poll_interval=1.0, force_polling=False):
+    """
+    Watch source directories until interrupted.
+
+    Conversions run one batch at a time on this thread, so the same file is
+    never converted twice concurrently; changes that arrive mid-conversion
+    are queued for the next batch.
+    """
+    queue = ChangeQueue(debounce)
+    directories = [d for d in WATCHED_DIRECTORIES if os.path.isdir(d)]
+
+    if Observer and not force_polling:
+        observer = Observer()
+        handler = SourceEventHandler(queue)
+        for directory in directories:
+            observer.schedule(handler, directory, recursive=True)
+        observer.start()
+        print(f"Watching {', '.join(directories)} for changes...", flush=True)
+    else:
+        threading.Thread(target=poll_changes, args=(queue, poll_interval), daemon=True).start()
+        print(f"Polling {', '.join(directories)} every {poll_interval}s "
+              "(pip install watchdog for native file events)...", flush=True)
+
+    try:
+        while True:
+            batch = queue.take_batch()
+            try:
+                dispatch(batch)
+            except Exception as e:
+                print(f"❌ Conversion failed: {e}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if Observer and not force_polling:
+            observer.stop()
+            observer.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch _notebooks and _docx and convert changed files')
+    parser.add_argument('--debounce', '-d', type=float, default=0.5,
+                       help='Seconds without new events before a batch converts (default: 0.5)')
+    parser.add_argument('--poll', action='store_true',
+                       help='Poll for changes instead of using native file events')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                       help='Polling interval in seconds (default: 1.0)')
+
+    args = parser.parse_args()
+    watch(args.debounce, args.poll_interval, args.poll)
+
+
+if __name__ == "__main__":
+    main()